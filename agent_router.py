@@ -1,34 +1,41 @@
 # agents/agent_router.py
-from langchain_openai import AzureChatOpenAI
-from langgraph.prebuilt import create_react_agent
-from langgraph.graph import StateGraph, END
-from langchain_core.runnables import RunnableLambda
+# langchain/langgraph는 import 비용이 커서 그래프를 처음 만들 때 import (resources.py 참고)
 from pydantic import BaseModel
 import json
-from typing import Optional
+from typing import AsyncIterator, Iterator, Optional
 import tools
+import tracing
+import utils
+from gazetteer import normalize_key
+from resources import get_resource, get_chat_llm
+from route_planner import DAYS_PATTERN
+from single_flight import SingleFlight
 import os
+import re
+
+# 실행 모드: "react" (ReAct Agent가 도구 선택, 기본값) 또는 "routed" (분류 후 도구 직접 실행)
+AGENT_MODE = os.getenv("AGENT_MODE", "react")
+
+# 같은 질문(공백/대소문자 무시)이 동시에 들어오면 Agent는 한 번만 실행하고 결과 공유
+agent_flight = SingleFlight("agent")
 
 class AgentState(BaseModel):
     input: str
     output: Optional[str] = None
+    route: Optional[str] = None
 
-# LLM 세팅 - Azure OpenAI 올바른 설정
-from langchain_openai import AzureChatOpenAI
+def _create_agent():
+    from langgraph.prebuilt import create_react_agent
 
-llm = AzureChatOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    azure_endpoint="https://reality0130-openai-001.openai.azure.com/",
-    deployment_name="dev-gpt-4.1-mini",
-    api_version="2024-10-21",
-    temperature=0
-)
+    # LangGraph ReAct Agent 생성
+    return create_react_agent(
+        model=get_chat_llm(),
+        tools=tools.get_tools()
+    )
 
-# LangGraph ReAct Agent 생성
-agent = create_react_agent(
-    model=llm,
-    tools=tools.tools
-)
+def get_agent():
+    """ReAct Agent (프로세스당 한 번 생성)"""
+    return get_resource("react_agent", _create_agent)
 
 def run_agent_node(state: AgentState):
     """StateGraph 노드 함수 - AgentState를 입력받고 state 업데이트를 반환"""
@@ -36,10 +43,32 @@ def run_agent_node(state: AgentState):
     
     # agent 실행 - 올바른 형식으로 호출
     agent_input = {"messages": [{"role": "user", "content": user_input}]}
-    output = agent.invoke(agent_input)
-    
-    print(f"Agent output: {output}")  # 디버깅용
-    
+    with tracing.span("agent.react"):
+        output = get_agent().invoke(agent_input, config=agent_config())
+        response = extract_agent_response(output)
+        log_agent_output(output, response)
+    return {"output": response}
+
+async def arun_agent_node(state: AgentState):
+    """run_agent_node()의 비동기 버전 - 도구도 비동기(coroutine)로 실행됨"""
+    agent_input = {"messages": [{"role": "user", "content": state.input}]}
+    with tracing.span("agent.react"):
+        output = await get_agent().ainvoke(agent_input, config=agent_config())
+        response = extract_agent_response(output)
+        log_agent_output(output, response)
+    return {"output": response}
+
+def agent_config() -> dict:
+    """ReAct Agent 실행 config - LLM 호출(agent turn)마다 span 기록"""
+    return {"callbacks": tracing.langchain_callbacks()}
+
+def log_agent_output(output, response: str):
+    """Agent 실행 결과 요약을 샘플링된 구조화 로그로 (메시지 전체를 출력하지 않음)"""
+    messages = output.get("messages", []) if isinstance(output, dict) else []
+    tool_calls = [call["name"] for message in messages for call in (getattr(message, "tool_calls", None) or [])]
+    tracing.log_event("agent_output", messages=len(messages), tool_calls=tool_calls, output_chars=len(response))
+
+def extract_agent_response(output) -> str:
     # output에서 실제 응답 추출
     if isinstance(output, dict) and "messages" in output:
         # 마지막 메시지의 내용을 가져옴
@@ -50,21 +79,221 @@ def run_agent_node(state: AgentState):
             response = str(last_message)
     else:
         response = json.dumps(output) if isinstance(output, dict) else str(output)
-    
-    # AgentState의 필드만 포함한 dict 반환 (상태 업데이트)
-    return {"output": response}
+    return response
+
+def make_node(func, afunc):
+    """invoke()에서는 func, ainvoke()/astream()에서는 afunc을 실행하는 노드"""
+    from langchain_core.runnables import RunnableLambda
+
+    return RunnableLambda(func, afunc=afunc)
+
+def build_graph():
+    """StateGraph 정의 - ReAct Agent 단일 노드"""
+    from langgraph.graph import StateGraph, END
+
+    builder = StateGraph(AgentState)
+    builder.add_node("agent", make_node(run_agent_node, arun_agent_node))
+    builder.set_entry_point("agent")
+    builder.add_edge("agent", END)
+    return builder.compile()
+
+def get_graph():
+    """컴파일된 ReAct 그래프 (프로세스당 한 번 생성)"""
+    return get_resource("graph", build_graph)
+
+# 규칙 기반 분류에 쓰는 여행 계획 패턴 (예: "2박3일", "3일 부산", "일정", "예산")
+# 일수 부분은 route_planner와 같은 패턴을 써서 "8월 15일" 같은 날짜는 계획으로 보지 않음
+PLAN_PATTERN = re.compile(rf"{DAYS_PATTERN.pattern}|일정|계획|예산|코스|여행지\s*추천")
+
+# 분류 결과 → (도구 이름, 동기 함수, 비동기 함수)
+ROUTE_TOOLS = {
+    "place": ("SearchTourGuide", tools.search_tour_guide, tools.asearch_tour_guide),
+    "plan": ("RecommendTripPlan", tools.recommend_trip_plan, tools.arecommend_trip_plan),
+}
+
+def route_from_label(label: str) -> str:
+    if "장소" in label and "조건" not in label:
+        return "place"
+    if "조건" in label and "장소" not in label:
+        return "plan"
+    return "agent"
+
+def classify_route(user_input: str) -> str:
+    """입력을 "place" / "plan" / "agent"(판단 불가 → ReAct 폴백) 중 하나로 분류"""
+    if PLAN_PATTERN.search(user_input):
+        return "plan"
+    return route_from_label(utils.classify_input(user_input))
+
+async def aclassify_route(user_input: str) -> str:
+    if PLAN_PATTERN.search(user_input):
+        return "plan"
+    return route_from_label(await utils.aclassify_input(user_input))
+
+def classify_node(state: AgentState):
+    """라우팅 그래프의 분류 노드"""
+    with tracing.span("agent.classify") as span:
+        route = classify_route(state.input)
+        span.set(route=route)
+    return {"route": route}
+
+async def aclassify_node(state: AgentState):
+    with tracing.span("agent.classify") as span:
+        route = await aclassify_route(state.input)
+        span.set(route=route)
+    return {"route": route}
+
+def make_tool_node(route: str):
+    """분류된 도구를 바로 실행하고 도구 결과를 그대로 최종 답변으로 사용하는 노드"""
+    def tool_node(state: AgentState):
+        _, func, _ = ROUTE_TOOLS[route]
+        return {"output": func(state.input)}
+
+    async def atool_node(state: AgentState):
+        _, _, afunc = ROUTE_TOOLS[route]
+        return {"output": await afunc(state.input)}
+    return make_node(tool_node, atool_node)
+
+def build_routed_graph():
+    """라우팅 그래프 정의 - 분류 → (관광지 검색 | 여행 계획 | ReAct 폴백)"""
+    from langgraph.graph import StateGraph, END
 
-# StateGraph 정의
-graph = StateGraph(AgentState)
-graph.add_node("agent", run_agent_node)  # RunnableLambda 래핑 불필요
-graph.set_entry_point("agent")
-graph.add_edge("agent", END)
-graph = graph.compile()
+    builder = StateGraph(AgentState)
+    builder.add_node("classify", make_node(classify_node, aclassify_node))
+    builder.add_node("place", make_tool_node("place"))
+    builder.add_node("plan", make_tool_node("plan"))
+    builder.add_node("agent", make_node(run_agent_node, arun_agent_node))
+    builder.set_entry_point("classify")
+    builder.add_conditional_edges("classify", lambda state: state.route, ["place", "plan", "agent"])
+    for node in ("place", "plan", "agent"):
+        builder.add_edge(node, END)
+    return builder.compile()
 
-def run_agent(user_input: str) -> str:
-    """외부 인터페이스 함수"""
+def get_routed_graph():
+    """컴파일된 라우팅 그래프 (프로세스당 한 번 생성)"""
+    return get_resource("routed_graph", build_routed_graph)
+
+def run_routed_agent(user_input: str) -> str:
+    """라우팅 그래프 인터페이스 함수 - ReAct의 도구 선택/답변 재작성 LLM 호출 없이 실행"""
+    with tracing.trace("agent.request", mode="routed"):
+        result = get_routed_graph().invoke({"input": user_input, "output": None})
+    return result.get("output") or "응답을 생성할 수 없습니다."
+
+def run_react_agent(user_input: str) -> str:
     initial_state = {"input": user_input, "output": None}
-    result = graph.invoke(initial_state)
+    with tracing.trace("agent.request", mode="react"):
+        result = get_graph().invoke(initial_state)
     
     # result는 dict이므로 키로 접근
-    return result.get("output") or "응답을 생성할 수 없습니다."
\ No newline at end of file
+    return result.get("output") or "응답을 생성할 수 없습니다."
+
+def flight_key(user_input: str, mode: str):
+    return (mode, normalize_key(user_input))
+
+def run_agent(user_input: str, mode: Optional[str] = None) -> str:
+    """외부 인터페이스 함수 (mode를 생략하면 AGENT_MODE 사용)
+
+    같은 질문을 처리 중인 호출이 있으면 그 결과를 기다려서 반환 (agent_flight)
+    """
+    mode = mode or AGENT_MODE
+    run = run_routed_agent if mode == "routed" else run_react_agent
+    return agent_flight.do(flight_key(user_input, mode), lambda: run(user_input))
+
+async def _arun_agent(user_input: str, mode: str) -> str:
+    graph = get_routed_graph() if mode == "routed" else get_graph()
+    with tracing.trace("agent.request", mode=mode):
+        result = await graph.ainvoke({"input": user_input, "output": None})
+    return result.get("output") or "응답을 생성할 수 없습니다."
+
+async def arun_agent(user_input: str, mode: Optional[str] = None) -> str:
+    """run_agent()의 비동기 버전 - 이벤트 루프 하나에서 여러 요청을 동시에 처리할 때 사용"""
+    mode = mode or AGENT_MODE
+    return await agent_flight.ado(flight_key(user_input, mode), lambda: _arun_agent(user_input, mode))
+
+def stream_routed_agent(user_input: str) -> Iterator[dict]:
+    """라우팅 그래프 스트리밍 - 도구 결과가 곧 답변이므로 완성된 답변을 한 번에 전달"""
+    route = classify_route(user_input)
+    if route == "agent":
+        yield from stream_agent(user_input, mode="react")
+        return
+    
+    tool_name, func, _ = ROUTE_TOOLS[route]
+    yield {"type": "tool_start", "tool": tool_name}
+    output = func(user_input) or "응답을 생성할 수 없습니다."
+    yield {"type": "tool_end", "tool": tool_name}
+    yield {"type": "token", "content": output}
+    yield {"type": "done", "output": output}
+
+async def astream_routed_agent(user_input: str) -> AsyncIterator[dict]:
+    route = await aclassify_route(user_input)
+    if route == "agent":
+        async for event in astream_agent(user_input, mode="react"):
+            yield event
+        return
+
+    tool_name, _, afunc = ROUTE_TOOLS[route]
+    yield {"type": "tool_start", "tool": tool_name}
+    output = await afunc(user_input) or "응답을 생성할 수 없습니다."
+    yield {"type": "tool_end", "tool": tool_name}
+    yield {"type": "token", "content": output}
+    yield {"type": "done", "output": output}
+
+def stream_agent(user_input: str, mode: Optional[str] = None) -> Iterator[dict]:
+    """스트리밍 인터페이스 함수 - 도구 호출 진행 상황과 답변 토큰을 이벤트로 yield
+
+    제너레이터라서 span 트리는 만들지 않음 - 호출하는 쪽에서 tracing.trace()로 감싸면 그 아래에 기록됨
+    호출마다 토큰을 따로 흘려보내므로 agent_flight로 합치지 않음 (Streamlit은 결과 단위로 합침)
+
+    이벤트 형식:
+        {"type": "tool_start", "tool": 도구명}
+        {"type": "tool_end", "tool": 도구명}
+        {"type": "token", "content": 답변 토큰}
+        {"type": "done", "output": 최종 답변 전체}
+    """
+    if (mode or AGENT_MODE) == "routed":
+        yield from stream_routed_agent(user_input)
+        return
+    
+    agent_input = {"messages": [{"role": "user", "content": user_input}]}
+    answer = []
+
+    for stream_mode, chunk in get_agent().stream(agent_input, config=agent_config(), stream_mode=["updates", "messages"]):
+        yield from _agent_events(stream_mode, chunk, answer)
+
+    yield {"type": "done", "output": "".join(answer) or "응답을 생성할 수 없습니다."}
+
+async def astream_agent(user_input: str, mode: Optional[str] = None) -> AsyncIterator[dict]:
+    """stream_agent()의 비동기 버전 - 이벤트 형식 동일"""
+    if (mode or AGENT_MODE) == "routed":
+        async for event in astream_routed_agent(user_input):
+            yield event
+        return
+
+    agent_input = {"messages": [{"role": "user", "content": user_input}]}
+    answer = []
+
+    async for stream_mode, chunk in get_agent().astream(agent_input, config=agent_config(), stream_mode=["updates", "messages"]):
+        for event in _agent_events(stream_mode, chunk, answer):
+            yield event
+
+    yield {"type": "done", "output": "".join(answer) or "응답을 생성할 수 없습니다."}
+
+def _agent_events(stream_mode: str, chunk, answer: list) -> Iterator[dict]:
+    """ReAct Agent 스트림 청크 하나를 이벤트로 변환 (answer에 답변 토큰 누적)"""
+    from langchain_core.messages import AIMessageChunk
+
+    if stream_mode == "messages":
+        message, metadata = chunk
+        # 도구 내부가 아닌 agent 노드의 LLM 토큰만 답변으로 전달
+        if metadata.get("langgraph_node") == "agent" and isinstance(message, AIMessageChunk) and message.content:
+            answer.append(message.content)
+            yield {"type": "token", "content": message.content}
+    else:
+        for node, update in chunk.items():
+            for message in (update or {}).get("messages", []):
+                if node == "agent" and getattr(message, "tool_calls", None):
+                    # 도구 호출 전에 나온 토큰은 최종 답변이 아님
+                    answer.clear()
+                    for tool_call in message.tool_calls:
+                        yield {"type": "tool_start", "tool": tool_call["name"]}
+                elif node == "tools":
+                    yield {"type": "tool_end", "tool": getattr(message, "name", None)}
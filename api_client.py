@@ -0,0 +1,60 @@
+# api_client.py
+"""TravelGenie API 서버(api_server.py) 클라이언트 - Streamlit 등이 Agent를 직접 실행하지 않고 호출할 때 사용"""
+import json
+import os
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# 설정하면 Streamlit이 이 API 서버를 호출 (비어 있으면 같은 프로세스에서 Agent 실행)
+TRAVELGENIE_API_URL = os.getenv("TRAVELGENIE_API_URL", "").rstrip("/")
+API_CLIENT_TIMEOUT = float(os.getenv("API_CLIENT_TIMEOUT", "90"))
+
+
+class APIClientError(Exception):
+    pass
+
+
+def _error_message(response) -> str:
+    try:
+        message = response.json().get("error")
+    except ValueError:
+        message = None
+    if response.status_code == 429:
+        return message or "요청이 많습니다. 잠시 후 다시 시도해주세요."
+    return f"API 서버 오류 ({response.status_code}): {message or response.text[:200]}"
+
+
+def stream_agent(user_input: str, structured: bool = True, mode: str = None, base_url: str = None):
+    """/v1/ask/stream 이벤트를 agent_router.stream_agent와 같은 형식의 dict로 yield
+
+    structured=True면 마지막에 {"type": "parsed"} 이벤트, 항상 {"type": "trace"} 이벤트가 옴
+    """
+    payload = {"input": user_input, "structured": structured}
+    if mode:
+        payload["mode"] = mode
+    url = f"{base_url or TRAVELGENIE_API_URL}/v1/ask/stream"
+    with httpx.stream("POST", url, json=payload, timeout=API_CLIENT_TIMEOUT) as response:
+        if response.status_code != 200:
+            response.read()
+            raise APIClientError(_error_message(response))
+        for line in response.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event["type"] == "error":
+                raise APIClientError(event["error"])
+            yield event
+
+
+def ask(user_input: str, structured: bool = False, mode: str = None, base_url: str = None) -> dict:
+    """/v1/ask 호출 - {"input", "output", "parsed"?, "trace_id", "duration_ms"}"""
+    payload = {"input": user_input, "structured": structured}
+    if mode:
+        payload["mode"] = mode
+    response = httpx.post(f"{base_url or TRAVELGENIE_API_URL}/v1/ask", json=payload, timeout=API_CLIENT_TIMEOUT)
+    if response.status_code != 200:
+        raise APIClientError(_error_message(response))
+    return response.json()
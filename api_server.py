@@ -0,0 +1,276 @@
+# api_server.py
+"""TravelGenie HTTP API (ASGI, Starlette) - Streamlit 없이 다른 서비스에서 Agent 호출
+
+엔드포인트:
+    POST /v1/ask           {"input", "mode"?, "structured"?}  Agent 답변 (structured=true면 구조화 결과 포함)
+    POST /v1/ask/stream    {"input", "mode"?, "structured"?}  NDJSON 이벤트 스트림 (agent_router.astream_agent 형식)
+    POST /v1/places/search {"input"}                          관광지 정보 (SearchTourGuide 도구)
+    POST /v1/trip-plan     {"input"}                          여행 일정 (RecommendTripPlan 도구)
+    POST /v1/structure     {"input", "response"}              답변 구조화 (요약/상세/키워드/팁/예산)
+    GET  /health                                               상태와 동시 처리 현황
+    GET  /metrics                                              Prometheus 텍스트 형식 지표
+
+프로세스 하나가 이벤트 루프 하나에서 최대 API_MAX_CONCURRENCY개 요청을 동시에 처리하고,
+가득 차면 기다리게 하지 않고 바로 429를 돌려준다. 수평 확장은 워커 프로세스 수(API_WORKERS)로 한다.
+
+실행:
+    python api_server.py
+    uvicorn api_server:app --host 0.0.0.0 --port 8080 --workers 4
+"""
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+import tools
+import tracing
+from agent_router import AGENT_MODE, arun_agent, astream_agent, get_graph, get_routed_graph
+from utils import RAG_BACKEND, aget_local_index, astructure_response
+
+load_dotenv()
+
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "16"))
+API_REQUEST_TIMEOUT = float(os.getenv("API_REQUEST_TIMEOUT", "60"))
+API_RETRY_AFTER_SECONDS = int(os.getenv("API_RETRY_AFTER_SECONDS", "2"))
+AGENT_MODES = ("react", "routed")
+
+
+class APIError(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class ConcurrencyLimiter:
+    """동시 처리 슬롯 - 빈 슬롯이 없으면 대기하지 않고 거절 (backpressure)"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.in_flight = 0
+        self.rejected = 0
+
+    def try_acquire(self) -> bool:
+        # 이벤트 루프 하나에서만 쓰므로 잠금 없이 카운터로 충분
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+
+
+limiter = ConcurrencyLimiter(API_MAX_CONCURRENCY)
+
+
+def error_response(status_code: int, message: str) -> JSONResponse:
+    headers = {"Retry-After": str(API_RETRY_AFTER_SECONDS)} if status_code == 429 else None
+    return JSONResponse({"error": message}, status_code=status_code, headers=headers)
+
+
+async def read_request(request, *fields) -> dict:
+    """JSON 본문에서 필수 문자열 필드와 선택 필드(mode, structured) 검증"""
+    try:
+        body = await request.json()
+    except (ValueError, UnicodeDecodeError):
+        raise APIError(400, "JSON 본문이 필요합니다.")
+    if not isinstance(body, dict):
+        raise APIError(400, "JSON 객체가 필요합니다.")
+    for field in fields:
+        if not isinstance(body.get(field), str) or not body[field].strip():
+            raise APIError(400, f"'{field}' 문자열이 필요합니다.")
+    mode = body.get("mode") or AGENT_MODE
+    if mode not in AGENT_MODES:
+        raise APIError(400, f"'mode'는 {', '.join(AGENT_MODES)} 중 하나여야 합니다.")
+    body["mode"] = mode
+    body["structured"] = bool(body.get("structured", False))
+    return body
+
+
+def record_request(endpoint: str, status: int):
+    tracing.metrics.inc("travelgenie_api_requests_total", help="API 요청 수", endpoint=endpoint, status=str(status))
+
+
+async def structured_result(user_input: str, response: str):
+    """구조화 결과 dict - 실패하면 None (답변 자체는 그대로 반환)"""
+    try:
+        return (await astructure_response(user_input, response)).model_dump()
+    except Exception as e:
+        tracing.log_event("structure_failed", error=f"{type(e).__name__}: {e}")
+        return None
+
+
+def json_endpoint(name: str, *fields):
+    """요청 검증 → 슬롯 확보(없으면 429) → 시간 제한(초과 시 504) 안에서 handler(body) 실행"""
+    def decorator(handler):
+        async def endpoint(request):
+            try:
+                body = await read_request(request, *fields)
+            except APIError as e:
+                record_request(name, e.status_code)
+                return error_response(e.status_code, e.message)
+            if not limiter.try_acquire():
+                record_request(name, 429)
+                return error_response(429, "요청이 많습니다. 잠시 후 다시 시도해주세요.")
+            start = time.perf_counter()
+            try:
+                with tracing.trace(f"api.{name}") as root:
+                    result = await asyncio.wait_for(handler(body), API_REQUEST_TIMEOUT)
+                result.update(trace_id=root.trace_id, duration_ms=round((time.perf_counter() - start) * 1000, 1))
+                record_request(name, 200)
+                return JSONResponse(result)
+            except asyncio.TimeoutError:
+                record_request(name, 504)
+                return error_response(504, f"{API_REQUEST_TIMEOUT:.0f}초 안에 응답을 만들지 못했습니다.")
+            except Exception as e:
+                record_request(name, 500)
+                return error_response(500, f"{type(e).__name__}: {e}")
+            finally:
+                limiter.release()
+        return endpoint
+    return decorator
+
+
+@json_endpoint("ask", "input")
+async def ask(body):
+    output = await arun_agent(body["input"], mode=body["mode"])
+    result = {"input": body["input"], "output": output}
+    if body["structured"]:
+        result["parsed"] = await structured_result(body["input"], output)
+    return result
+
+
+@json_endpoint("places_search", "input")
+async def places_search(body):
+    return {"input": body["input"], "output": await tools.asearch_tour_guide(body["input"])}
+
+
+@json_endpoint("trip_plan", "input")
+async def trip_plan(body):
+    return {"input": body["input"], "output": await tools.arecommend_trip_plan(body["input"])}
+
+
+@json_endpoint("structure", "input", "response")
+async def structure(body):
+    return {"input": body["input"], "parsed": await structured_result(body["input"], body["response"])}
+
+
+def ndjson(event: dict) -> bytes:
+    return (json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+async def stream_events(body):
+    """astream_agent 이벤트를 NDJSON으로 - 시간 제한 초과/오류도 이벤트로 알리고 종료
+
+    마지막에 structured=true면 {"type": "parsed"}, 항상 {"type": "trace"} 이벤트를 보냄
+    """
+    deadline = time.monotonic() + API_REQUEST_TIMEOUT
+    status, output = 200, None
+    try:
+        with tracing.trace("api.ask_stream", mode=body["mode"]) as root:
+            events = astream_agent(body["input"], mode=body["mode"])
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError
+                    try:
+                        event = await asyncio.wait_for(events.__anext__(), remaining)
+                    except StopAsyncIteration:
+                        break
+                    if event["type"] == "done":
+                        output = event["output"]
+                    yield ndjson(event)
+                if body["structured"] and output is not None:
+                    yield ndjson({"type": "parsed", "result": await structured_result(body["input"], output)})
+            finally:
+                await events.aclose()
+        yield ndjson({"type": "trace", "trace_id": root.trace_id, "duration_ms": round(root.duration * 1000, 1),
+                      "stages": tracing.stage_summary(root)})
+    except asyncio.TimeoutError:
+        status = 504
+        yield ndjson({"type": "error", "error": f"{API_REQUEST_TIMEOUT:.0f}초 안에 응답을 만들지 못했습니다."})
+    except Exception as e:
+        status = 500
+        yield ndjson({"type": "error", "error": f"{type(e).__name__}: {e}"})
+    finally:
+        record_request("ask_stream", status)
+
+
+class SlotStreamingResponse(StreamingResponse):
+    """응답이 끝나면 (본문을 보내기 전에 클라이언트가 끊어도) 동시 처리 슬롯을 한 번만 반납"""
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            limiter.release()
+
+
+async def ask_stream(request):
+    try:
+        body = await read_request(request, "input")
+    except APIError as e:
+        record_request("ask_stream", e.status_code)
+        return error_response(e.status_code, e.message)
+    if not limiter.try_acquire():
+        record_request("ask_stream", 429)
+        return error_response(429, "요청이 많습니다. 잠시 후 다시 시도해주세요.")
+    return SlotStreamingResponse(stream_events(body), media_type="application/x-ndjson")
+
+
+async def health(request):
+    return JSONResponse({
+        "status": "ok",
+        "mode": AGENT_MODE,
+        "in_flight": limiter.in_flight,
+        "capacity": limiter.capacity,
+        "rejected": limiter.rejected,
+    })
+
+
+async def metrics(request):
+    return PlainTextResponse(tracing.metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # 첫 요청이 그래프 컴파일 시간(local이면 인덱스 생성까지)을 떠안지 않도록 시작할 때 준비
+    get_graph()
+    get_routed_graph()
+    if RAG_BACKEND == "local":
+        await aget_local_index()
+    yield
+
+
+app = Starlette(
+    routes=[
+        Route("/v1/ask", ask, methods=["POST"]),
+        Route("/v1/ask/stream", ask_stream, methods=["POST"]),
+        Route("/v1/places/search", places_search, methods=["POST"]),
+        Route("/v1/trip-plan", trip_plan, methods=["POST"]),
+        Route("/v1/structure", structure, methods=["POST"]),
+        Route("/health", health),
+        Route("/metrics", metrics),
+    ],
+    lifespan=lifespan,
+)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        "api_server:app",
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8080")),
+        workers=int(os.getenv("API_WORKERS", "1"))
+    )
@@ -0,0 +1,229 @@
+# benchmarks/fakes.py
+"""벤치마크용 가짜 Azure OpenAI / Azure AI Search / Kakao 클라이언트
+
+fixtures/recorded.json의 기록된 응답을 정해진 지연 시간 뒤에 돌려주고 호출 횟수를 센다.
+호출 횟수는 요청 경로와 백그라운드 색인 큐(indexing-queue 스레드)를 나눠서 집계한다.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import numpy as np
+
+FIXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "recorded.json")
+
+
+def load_fixture(path: str = FIXTURE_PATH) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class CallCounter:
+    """엔드포인트별 호출 횟수 (요청 경로 / 백그라운드 색인 큐)"""
+
+    def __init__(self):
+        self.foreground = Counter()
+        self.background = Counter()
+        self._lock = threading.Lock()
+
+    def add(self, name: str):
+        with self._lock:
+            # LangGraph는 도구를 스레드 풀에서 실행하므로 메인 스레드 여부가 아니라 스레드 이름으로 구분
+            if threading.current_thread().name == "indexing-queue":
+                self.background[name] += 1
+            else:
+                self.foreground[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return Counter(self.foreground), Counter(self.background)
+
+
+class Latency:
+    """엔드포인트별 주입 지연 시간(초)"""
+
+    def __init__(self, llm=0.3, embed=0.05, search=0.03, kakao=0.1):
+        self.llm = llm
+        self.embed = embed
+        self.search = search
+        self.kakao = kakao
+
+    def as_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def fake_embedding(text: str, dim: int):
+    """텍스트마다 고정된 단위 벡터 - 같은 텍스트는 항상 같은 벡터"""
+    seed = int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:16], 16)
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def estimate_tokens(text: str) -> int:
+    # 한국어 기준 대략 1.5자당 1토큰
+    return max(1, int(len(text) / 1.5))
+
+
+def _usage(prompt: str, completion: str = ""):
+    prompt_tokens, completion_tokens = estimate_tokens(prompt), estimate_tokens(completion) if completion else 0
+    return SimpleNamespace(
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        total_tokens=prompt_tokens + completion_tokens
+    )
+
+
+class FakeOpenAI:
+    """AzureOpenAI 대체 - embeddings.create / chat.completions.create / beta.chat.completions.parse"""
+
+    def __init__(self, fixture: dict, latency: Latency, counter: CallCounter):
+        import utils
+
+        self.fixture = fixture
+        self.latency = latency
+        self.counter = counter
+        # 어떤 프롬프트인지는 utils의 시스템 프롬프트로 구분
+        self._kinds = {
+            utils._classify_messages("")[0]["content"]: "classify",
+            utils._extract_messages("")[0]["content"]: "extract",
+            utils._gpt_messages("")[0]["content"]: "gpt",
+            utils._itinerary_messages("", "")[0]["content"]: "itinerary",
+        }
+        self._rag_prefix = utils._rag_messages("", "")[0]["content"]
+        self.embeddings = SimpleNamespace(create=self._embed)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._chat))
+        self.beta = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(parse=self._parse)))
+
+    def _embed(self, input, model, **kwargs):
+        self.counter.add("embeddings")
+        time.sleep(self.latency.embed)
+        dim = self.fixture["embedding_dim"]
+        return SimpleNamespace(
+            data=[SimpleNamespace(index=i, embedding=fake_embedding(text, dim)) for i, text in enumerate(input)],
+            usage=_usage("".join(input))
+        )
+
+    def _kind(self, messages) -> str:
+        system = messages[0]["content"]
+        if system in self._kinds:
+            return self._kinds[system]
+        if system.startswith(self._rag_prefix):
+            return "rag"
+        return "gpt"
+
+    def _answer(self, kind: str, user: str) -> str:
+        recorded = self.fixture["chat"]
+        if kind == "classify":
+            return recorded["classify"].get(user, "조건")
+        if kind == "extract":
+            return recorded["extract"].get(user, user.split()[0])
+        if kind == "itinerary":
+            return recorded["gpt"]
+        return recorded[kind]
+
+    def _chat(self, model, messages, **kwargs):
+        kind = self._kind(messages)
+        self.counter.add(f"chat.{kind}")
+        time.sleep(self.latency.llm)
+        content = self._answer(kind, messages[-1]["content"])
+        prompt = "".join(message["content"] for message in messages)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content, refusal=None, parsed=None))],
+            usage=_usage(prompt, content)
+        )
+
+    def _parse(self, model, messages, response_format, **kwargs):
+        self.counter.add("chat.structure")
+        time.sleep(self.latency.llm)
+        parsed = response_format.model_validate(self.fixture["chat"]["structure"])
+        prompt = "".join(message["content"] for message in messages)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=parsed.model_dump_json(), refusal=None, parsed=parsed))],
+            usage=_usage(prompt, parsed.model_dump_json())
+        )
+
+
+class FakeSearchClient:
+    """Azure AI Search SearchClient 대체 - LocalVectorIndex로 검색"""
+
+    def __init__(self, latency: Latency, counter: CallCounter):
+        from vector_index import LocalVectorIndex
+
+        self.latency = latency
+        self.counter = counter
+        self.index = LocalVectorIndex()
+        self.documents = {}
+
+    def load(self, documents):
+        """인덱스를 documents만 있는 상태로 교체 (호출 횟수에 포함하지 않음)"""
+        from vector_index import LocalVectorIndex
+
+        self.index = LocalVectorIndex()
+        self.index.upsert_many(documents)
+        self.documents = {doc["id"]: doc for doc in documents}
+
+    def search(self, search_text="", vector_queries=None, **kwargs):
+        self.counter.add("search")
+        time.sleep(self.latency.search)
+        query = vector_queries[0]
+        return self.index.search(query["vector"], k=query.get("k", 3))
+
+    def merge_or_upload_documents(self, documents):
+        self.counter.add("search.upload")
+        time.sleep(self.latency.search)
+        self.index.upsert_many(documents)
+        self.documents.update((doc["id"], doc) for doc in documents)
+        return [SimpleNamespace(key=doc["id"], succeeded=True) for doc in documents]
+
+
+class FakeKakaoSession:
+    """requests.Session 대체 - KakaoLocalClient의 캐시/속도 제한은 그대로 거침"""
+
+    def __init__(self, fixture: dict, latency: Latency, counter: CallCounter):
+        self.fixture = fixture
+        self.latency = latency
+        self.counter = counter
+        self.headers = {}
+
+    def get(self, url, params=None, timeout=None):
+        self.counter.add("kakao")
+        time.sleep(self.latency.kakao)
+        documents = self.fixture["kakao"].get(params["query"], [])
+        return SimpleNamespace(status_code=200, text="", json=lambda: {"documents": documents})
+
+
+def make_fake_chat_model(fixture: dict, latency: Latency, counter: CallCounter):
+    """ReAct Agent용 가짜 LangChain 채팅 모델
+
+    첫 호출에서는 입력에 맞는 도구 호출을, 도구 결과를 받은 뒤에는 그 결과를 정리한 답변을 반환한다.
+    """
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, ToolMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+    from agent_router import PLAN_PATTERN
+
+    class ReplayChatModel(BaseChatModel):
+        @property
+        def _llm_type(self) -> str:
+            return "benchmark-replay"
+
+        def bind_tools(self, tools, **kwargs):
+            return self
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            counter.add("chat.agent")
+            time.sleep(latency.llm)
+            last = messages[-1]
+            if isinstance(last, ToolMessage):
+                message = AIMessage(content=f"{last.content}\n\n더 궁금한 점이 있으면 말씀해주세요.")
+            else:
+                text = last.content
+                tool = "RecommendTripPlan" if PLAN_PATTERN.search(text) else "SearchTourGuide"
+                message = AIMessage(content="", tool_calls=[{"name": tool, "args": {"__arg1": text}, "id": "call_0"}])
+            return ChatResult(generations=[ChatGeneration(message=message)])
+
+    return ReplayChatModel()
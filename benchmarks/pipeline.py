@@ -0,0 +1,290 @@
+# benchmarks/pipeline.py
+"""RAG / Agent 경로 단계별 오프라인 벤치마크 - Azure, Kakao 없이 기록된 응답(fixtures/recorded.json)으로 실행
+
+가짜 클라이언트(fakes.py)가 엔드포인트별로 정해진 지연 시간을 주입하므로 같은 설정이면
+커밋 간 결과를 비교할 수 있다. 단계마다 다음을 측정한다.
+    cold  - 캐시(임베딩/시맨틱/부정/Kakao)와 검색 인덱스를 초기화한 뒤 첫 호출 시간
+    warm  - 바로 이어서 같은 입력으로 다시 호출한 시간
+    calls - 요청 경로에서 호출한 외부 엔드포인트 횟수 (호출 1회 평균, 백그라운드는 따로)
+    alloc - tracemalloc 기준 최대/순 메모리 할당
+
+사용법 (저장소 루트에서):
+    python benchmarks/pipeline.py
+    python benchmarks/pipeline.py --repeat 5 --llm-latency 0.5 --output base.json
+    python benchmarks/pipeline.py --compare base.json
+    python benchmarks/pipeline.py --stages search_tour_guide run_agent
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCHMARK_DIR)
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+sys.path.insert(0, ROOT)
+
+from fakes import CallCounter, FakeKakaoSession, FakeOpenAI, FakeSearchClient, Latency, load_fixture, make_fake_chat_model
+from startup import DUMMY_ENV
+
+
+def prepare_environment(workdir: str):
+    """저장소 모듈을 import하기 전에 호출 - 실행 중 생기는 파일은 모두 workdir에"""
+    os.environ.update(DUMMY_ENV)
+    os.environ.update({
+        "AZURE_OPENAI_DEPLOYMENT_NAME": "benchmark-chat",
+        "AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME": "benchmark-embedding",
+        "KAKAO_API_KEY": "benchmark",
+        "KAKAO_BURST": "1000000",  # 클라이언트 측 속도 제한 때문에 기다리지 않도록
+        "RAG_BACKEND": "azure",
+        "AGENT_MODE": "react",
+        "PLACE_STORE_PATH": os.path.join(workdir, "tour_data.jsonl"),
+        "LEGACY_TOUR_DATA_PATH": os.path.join(ROOT, "tour_data.json"),
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embedding_cache.sqlite3"),
+        "INDEX_MANIFEST_PATH": os.path.join(workdir, "index_manifest.sqlite3"),
+        "INDEXING_FLUSH_INTERVAL": "0.01",
+    })
+
+
+class Harness:
+    """가짜 클라이언트 주입과 캐시/인덱스 초기화"""
+
+    def __init__(self, fixture: dict, latency: Latency, workdir: str):
+        import kakaoAPI
+        import resources
+        import utils
+        from bulk_index import index_places
+
+        self.fixture = fixture
+        self.workdir = workdir
+        self.counter = CallCounter()
+        self.search_client = FakeSearchClient(latency, self.counter)
+        resources.override("openai_client", FakeOpenAI(fixture, latency, self.counter))
+        resources.override("search_client", self.search_client)
+        resources.override("chat_llm", make_fake_chat_model(fixture, latency, self.counter))
+        kakaoAPI.get_kakao_client().session = FakeKakaoSession(fixture, latency, self.counter)
+
+        self.base_places = utils.load_places()
+        index_places(self.base_places)
+        self.base_docs = list(self.search_client.documents.values())
+        self._resets = 0
+
+    def reset(self):
+        """cold 측정 전 상태로 - 처음 색인한 장소만 있는 인덱스, 빈 캐시"""
+        import kakaoAPI
+        import resources
+        import tools
+        from embedding_cache import EmbeddingCache
+        from gazetteer import ALIASES, Gazetteer, get_gazetteer
+
+        tools.indexing_queue.join()
+        tools.semantic_cache.invalidate()
+        tools.negative_cache.clear()
+        kakaoAPI.get_kakao_client().cache.clear()
+        self._resets += 1
+        resources.override(
+            "embedding_cache",
+            EmbeddingCache(os.path.join(self.workdir, f"embedding_cache_{self._resets}.sqlite3"))
+        )
+        self.search_client.load(self.base_docs)
+        # 미스 경로에서 새로 저장된 장소 이름도 잊도록 장소 사전의 트라이를 처음 상태로
+        get_gazetteer()._root = Gazetteer((place["name"] for place in self.base_places), ALIASES)._root
+
+
+def build_stages(fixture: dict) -> dict:
+    """단계 이름 → (함수, 인자 목록)"""
+    import agent_router
+    import tools
+    import utils
+    from gazetteer import get_gazetteer
+    from place_store import get_place_store
+
+    queries = fixture["queries"]
+    recorded = fixture["chat"]
+    hits = queries["place_gazetteer"] + queries["place_llm"]
+    place_queries = hits + queries["place_kakao"] + queries["place_not_found"]
+    names = [get_gazetteer().find(query) or recorded["extract"][query] for query in hits + queries["place_kakao"]]
+    contexts = [(query, get_place_store().get(name)["description"]) for query, name in zip(hits, names)]
+
+    def parse_agent_response(user_input, response):
+        # streamlit_app.parse_agent_response의 본체 (Streamlit 스크립트는 import하면 화면을 그리므로 직접 호출)
+        return utils.structure_response(user_input, response).model_dump()
+
+    return {
+        "extract_place_name": (utils.extract_place_name, [(query,) for query in hits]),
+        "embed_text": (utils.embed_text, [(query,) for query in place_queries]),
+        "search_rag": (utils.search_rag, [(name,) for name in names]),
+        "chat_with_rag": (utils.chat_with_rag, contexts),
+        "search_tour_guide[hit]": (tools.search_tour_guide, [(query,) for query in hits]),
+        "search_tour_guide[kakao]": (tools.search_tour_guide, [(query,) for query in queries["place_kakao"]]),
+        "search_tour_guide[not_found]": (tools.search_tour_guide, [(query,) for query in queries["place_not_found"]]),
+        "run_agent[react]": (agent_router.run_agent, [(query, "react") for query in hits + queries["plan"]]),
+        "run_agent[routed]": (agent_router.run_agent, [(query, "routed") for query in hits + queries["plan"]]),
+        "parse_agent_response": (parse_agent_response, [(query, recorded["gpt"]) for query in queries["plan"]]),
+    }
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[round(q * (len(values) - 1))]
+
+
+def summarize(seconds) -> dict:
+    ms = [value * 1000 for value in seconds]
+    return {
+        "mean_ms": round(sum(ms) / len(ms), 2),
+        "p50_ms": round(percentile(ms, 0.5), 2),
+        "p95_ms": round(percentile(ms, 0.95), 2),
+        "min_ms": round(min(ms), 2),
+    }
+
+
+def per_call(counter: Counter, runs: int) -> dict:
+    return {name: round(count / runs, 2) for name, count in sorted(counter.items())}
+
+
+def run_stage(harness: Harness, func, inputs, repeat: int) -> dict:
+    import tools
+
+    cold, warm = [], []
+    calls, background = Counter(), Counter()
+    for _ in range(repeat):
+        for args in inputs:
+            harness.reset()
+            foreground_before, background_before = harness.counter.snapshot()
+            start = time.perf_counter()
+            func(*args)
+            cold.append(time.perf_counter() - start)
+            foreground_after, _ = harness.counter.snapshot()
+            tools.indexing_queue.join()
+            _, background_after = harness.counter.snapshot()
+            calls += foreground_after - foreground_before
+            background += background_after - background_before
+
+            start = time.perf_counter()
+            func(*args)
+            warm.append(time.perf_counter() - start)
+
+    peaks, nets = [], []
+    for args in inputs:
+        harness.reset()
+        tracemalloc.start()
+        func(*args)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        tools.indexing_queue.join()
+        peaks.append(peak)
+        nets.append(current)
+
+    return {
+        "runs": len(cold),
+        "cold": summarize(cold),
+        "warm": summarize(warm),
+        "calls": per_call(calls, len(cold)),
+        "background_calls": per_call(background, len(cold)),
+        "alloc_peak_kb": round(max(peaks) / 1024, 1),
+        "alloc_net_kb": round(sum(nets) / len(nets) / 1024, 1),
+    }
+
+
+def git_revision() -> str:
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return revision + ("-dirty" if dirty else "")
+
+
+def format_calls(calls: dict) -> str:
+    return ", ".join(f"{name} {count:g}" for name, count in calls.items()) or "-"
+
+
+def print_report(report: dict):
+    meta = report["meta"]
+    print(f"== {meta['revision']}  repeat={meta['repeat']}  latency={meta['latency']}")
+    print(f"{'stage':<30}{'cold p50':>10}{'cold p95':>10}{'warm p50':>10}{'peak KB':>10}  calls/run")
+    for name, stage in report["stages"].items():
+        print(
+            f"{name:<30}{stage['cold']['p50_ms']:>10.1f}{stage['cold']['p95_ms']:>10.1f}"
+            f"{stage['warm']['p50_ms']:>10.1f}{stage['alloc_peak_kb']:>10.1f}  {format_calls(stage['calls'])}"
+        )
+
+
+def print_comparison(base: dict, report: dict):
+    """같은 단계의 cold/warm p50과 호출 수를 기준 결과와 비교"""
+    if base["meta"]["latency"] != report["meta"]["latency"]:
+        print("\n(주의) 기준 결과와 주입 지연 설정이 다릅니다.")
+    print(f"\n== {base['meta']['revision']} → {report['meta']['revision']}")
+    print(f"{'stage':<30}{'cold p50':>20}{'warm p50':>20}  calls/run")
+    for name, stage in report["stages"].items():
+        old = base["stages"].get(name)
+        if old is None:
+            print(f"{name:<30}{'(new)':>20}")
+            continue
+        cells = []
+        for mode in ("cold", "warm"):
+            before, after = old[mode]["p50_ms"], stage[mode]["p50_ms"]
+            change = (after - before) / before * 100 if before else 0.0
+            cells.append(f"{after:8.1f} ({change:+6.1f}%)")
+        before_calls, after_calls = sum(old["calls"].values()), sum(stage["calls"].values())
+        print(f"{name:<30}{cells[0]:>20}{cells[1]:>20}  {before_calls:g} → {after_calls:g}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="RAG/Agent 단계별 오프라인 벤치마크")
+    parser.add_argument("--repeat", type=int, default=3, help="입력마다 cold/warm 측정 반복 횟수")
+    parser.add_argument("--stages", nargs="+", help="측정할 단계 (이름 앞부분 일치, 기본값: 전체)")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="채팅 호출 지연(초)")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="임베딩 호출 지연(초)")
+    parser.add_argument("--search-latency", type=float, default=0.03, help="Azure AI Search 호출 지연(초)")
+    parser.add_argument("--kakao-latency", type=float, default=0.1, help="Kakao API 호출 지연(초)")
+    parser.add_argument("--fixture", default=None, help="기록된 응답 파일 (기본값: fixtures/recorded.json)")
+    parser.add_argument("--output", help="결과 JSON 경로 (기본값: benchmarks/results/<커밋>.json)")
+    parser.add_argument("--compare", help="비교할 기준 결과 JSON")
+    args = parser.parse_args()
+
+    latency = Latency(llm=args.llm_latency, embed=args.embed_latency, search=args.search_latency, kakao=args.kakao_latency)
+    fixture = load_fixture(args.fixture) if args.fixture else load_fixture()
+
+    with tempfile.TemporaryDirectory(prefix="travelgenie-bench-") as workdir:
+        prepare_environment(workdir)
+        results = {}
+        # 저장소 코드의 디버깅 출력은 표에 섞이지 않도록 숨김
+        with contextlib.redirect_stdout(io.StringIO()):
+            harness = Harness(fixture, latency, workdir)
+            stages = build_stages(fixture)
+            for name, (func, inputs) in stages.items():
+                if args.stages and not any(name.startswith(prefix) for prefix in args.stages):
+                    continue
+                results[name] = run_stage(harness, func, inputs, args.repeat)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "repeat": args.repeat,
+            "latency": latency.as_dict(),
+        },
+        "stages": results,
+    }
+    print_report(report)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['meta']['revision']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n결과 저장: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(json.load(f), report)
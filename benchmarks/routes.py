@@ -0,0 +1,75 @@
+# benchmarks/routes.py
+"""동선 계산(route_planner) 측정 - 장소 수별 거리 행렬 / 최근접 이웃 / 2-opt / 날짜 나누기 시간과 경로 길이
+
+API 호출이 없으므로 가짜 클라이언트 없이 무작위 좌표(서울 부근)로 측정한다.
+
+사용법 (저장소 루트에서):
+    python benchmarks/routes.py
+    python benchmarks/routes.py --sizes 10 50 200 --repeat 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from route_planner import distance_matrix, nearest_neighbor_order, route_length, split_days, two_opt  # noqa: E402
+
+# 서울 부근 (위도, 경도) 범위
+LAT_RANGE = (37.45, 37.70)
+LNG_RANGE = (126.80, 127.15)
+
+
+def random_coordinates(n: int, seed: int):
+    rng = np.random.default_rng(seed)
+    return np.column_stack([rng.uniform(*LAT_RANGE, n), rng.uniform(*LNG_RANGE, n)])
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def measure(n: int, repeat: int) -> dict:
+    """장소 n개로 repeat번 (좌표는 매번 다르게) 측정한 단계별 p50(ms)과 평균 경로 단축률"""
+    times = {"matrix": [], "nearest": [], "two_opt": [], "split": []}
+    gains, lengths = [], []
+    for seed in range(repeat):
+        dist, elapsed = timed(distance_matrix, random_coordinates(n, seed))
+        times["matrix"].append(elapsed)
+        order, elapsed = timed(nearest_neighbor_order, dist)
+        times["nearest"].append(elapsed)
+        optimized, elapsed = timed(two_opt, order, dist)
+        times["two_opt"].append(elapsed)
+        _, elapsed = timed(split_days, optimized, dist)
+        times["split"].append(elapsed)
+
+        before, after = route_length(order, dist), route_length(optimized, dist)
+        gains.append((before - after) / before * 100 if before else 0.0)
+        lengths.append(after)
+    result = {stage: statistics.median(values) for stage, values in times.items()}
+    result["total"] = sum(result.values())
+    result["gain_pct"] = statistics.mean(gains)
+    result["length_km"] = statistics.mean(lengths)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="route_planner 장소 수별 실행 시간 측정")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 25, 50, 100, 200], help="장소 수")
+    parser.add_argument("--repeat", type=int, default=10, help="장소 수별 반복 횟수 (p50 사용)")
+    args = parser.parse_args()
+
+    print(f"{'stops':>6}{'matrix':>10}{'nearest':>10}{'2-opt':>10}{'split':>10}{'total ms':>10}{'2-opt 단축':>12}{'경로 km':>10}")
+    for size in args.sizes:
+        row = measure(size, args.repeat)
+        print(
+            f"{size:>6}{row['matrix']:>10.2f}{row['nearest']:>10.2f}{row['two_opt']:>10.2f}{row['split']:>10.2f}"
+            f"{row['total']:>10.2f}{row['gain_pct']:>11.1f}%{row['length_km']:>10.1f}"
+        )
@@ -0,0 +1,92 @@
+# benchmarks/startup.py
+"""콜드 스타트 측정 - 모듈 import 시간(python -X importtime)과 첫 리소스 생성 시간
+
+사용법 (저장소 루트에서):
+    python benchmarks/startup.py
+    python benchmarks/startup.py --modules agent_router tools --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 네트워크 호출 없이 클라이언트 객체만 만들 수 있도록 비어 있는 설정은 더미 값으로 채움
+DUMMY_ENV = {
+    "AZURE_OPENAI_API_KEY": "benchmark",
+    "AZURE_OPENAI_ENDPOINT": "https://benchmark.openai.azure.com/",
+    "AZURE_OPENAI_API_VERSION": "2024-10-21",
+    "AZURE_SEARCH_ENDPOINT": "https://benchmark.search.windows.net",
+    "AZURE_SEARCH_INDEX_NAME": "benchmark",
+    "AZURE_SEARCH_API_KEY": "benchmark",
+}
+
+WARM_UP_CODE = """
+import time
+start = time.perf_counter()
+import agent_router, utils
+imported = time.perf_counter()
+utils.get_openai_client()
+utils.get_search_client()
+agent_router.get_graph()
+agent_router.get_routed_graph()
+ready = time.perf_counter()
+print(f"{imported - start:.4f} {ready - imported:.4f}")
+"""
+
+
+def workdir_env(workdir: str) -> dict:
+    """실행 중 생기는 파일(장소 저장소, 캐시, 매니페스트)은 저장소 루트가 아니라 workdir에"""
+    return {
+        "PLACE_STORE_PATH": os.path.join(workdir, "tour_data.jsonl"),
+        "LEGACY_TOUR_DATA_PATH": os.path.join(ROOT, "tour_data.json"),
+        "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embedding_cache.sqlite3"),
+        "INDEX_MANIFEST_PATH": os.path.join(workdir, "index_manifest.sqlite3"),
+    }
+
+
+def run_python(args, env):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True)
+
+
+def import_times(module, env):
+    """-X importtime 출력에서 (누적 시간[us], 모듈명) 목록과 전체 시간 반환"""
+    result = run_python(["-X", "importtime", "-c", f"import {module}"], env)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # "import time: self | cumulative | <들여쓰기>모듈명" - 들여쓰기가 없으면 최상위 import
+        self_us, cumulative_us, name = line.split(":", 1)[1].split("|")
+        rows.append((int(cumulative_us), int(self_us), name[1:].rstrip()))
+    total = next((cumulative for cumulative, _, name in reversed(rows) if name == module), 0)
+    return rows, total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="import 시간 / 첫 리소스 생성 시간 측정")
+    parser.add_argument("--modules", nargs="+", default=["utils", "tools", "agent_router"])
+    parser.add_argument("--top", type=int, default=10, help="모듈별로 보여줄 느린 import 개수")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="travelgenie-startup-") as workdir:
+        env = {**DUMMY_ENV, **os.environ, **workdir_env(workdir)}
+
+        for module in args.modules:
+            rows, total = import_times(module, env)
+            print(f"\n== import {module}: {total / 1000:.1f} ms")
+            # module이 직접 import한 모듈(들여쓰기 한 단계)을 누적 시간이 큰 순서로
+            children = [row for row in rows if row[2].startswith("  ") and not row[2].startswith("    ")]
+            for cumulative, _, name in sorted(children, reverse=True)[:args.top]:
+                print(f"  {cumulative / 1000:8.1f} ms  {name.strip()}")
+
+        result = run_python(["-c", WARM_UP_CODE], env)
+        if result.returncode == 0:
+            imported, ready = (float(value) for value in result.stdout.split())
+            print(f"\n== 첫 사용: import {imported * 1000:.1f} ms + 클라이언트/그래프 생성 {ready * 1000:.1f} ms")
+        else:
+            print(f"\n== 첫 사용 측정 실패: {result.stderr.strip().splitlines()[-1]}")
@@ -0,0 +1,99 @@
+# bulk_index.py
+"""장소 데이터 전체를 배치 단위로 임베딩해서 검색 인덱스에 올리는 명령
+
+사용법:
+    python bulk_index.py --embed-batch-size 256 --upload-batch-size 500
+"""
+import argparse
+import time
+
+from utils import load_places, embed_texts, make_safe_id, make_search_document, upload_documents_to_search
+
+
+def with_retries(func, retries=3, backoff=1.0, label=""):
+    """func 실행이 실패하면 지수 백오프로 재시도"""
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            wait = backoff * (2 ** attempt)
+            print(f"{label} 실패 ({e}), {wait:.1f}초 후 재시도 ({attempt + 1}/{retries})")
+            time.sleep(wait)
+
+
+def upload_with_retries(docs, retries=3, backoff=1.0, label=""):
+    """문서 업로드 - 실패한 문서만 골라 재시도하고 끝까지 실패한 문서 id 목록 반환"""
+    pending = docs
+    for attempt in range(retries + 1):
+        try:
+            failed = set(upload_documents_to_search(pending))
+        except Exception as e:
+            print(f"{label} 업로드 오류: {e}")
+            failed = {doc["id"] for doc in pending}
+        pending = [doc for doc in pending if doc["id"] in failed]
+        if not pending or attempt == retries:
+            break
+        wait = backoff * (2 ** attempt)
+        print(f"{label} 문서 {len(pending)}개 업로드 실패, {wait:.1f}초 후 재시도 ({attempt + 1}/{retries})")
+        time.sleep(wait)
+    return [doc["id"] for doc in pending]
+
+
+def index_places(places, embed_batch_size=256, upload_batch_size=500, retries=3):
+    """장소 목록을 배치로 임베딩/업로드하고 결과 요약 반환"""
+    report = {"indexed": 0, "failed": [], "batches": 0}
+    docs = []
+
+    def flush(chunk):
+        report["batches"] += 1
+        label = f"[업로드 배치 {report['batches']}]"
+        failed = upload_with_retries(chunk, retries=retries, label=label)
+        report["indexed"] += len(chunk) - len(failed)
+        report["failed"].extend(failed)
+        print(f"{label} {len(chunk) - len(failed)}/{len(chunk)}개 완료")
+
+    for i in range(0, len(places), embed_batch_size):
+        batch = places[i:i + embed_batch_size]
+        label = f"[임베딩 {i + 1}-{i + len(batch)}]"
+        try:
+            vectors = with_retries(
+                lambda: embed_texts([place["name"] for place in batch]),
+                retries=retries,
+                label=label
+            )
+        except Exception as e:
+            print(f"{label} 최종 실패: {e}")
+            report["failed"].extend(make_safe_id(place["name"]) for place in batch)
+            continue
+
+        docs.extend(make_search_document(place, vector) for place, vector in zip(batch, vectors))
+        while len(docs) >= upload_batch_size:
+            flush(docs[:upload_batch_size])
+            docs = docs[upload_batch_size:]
+
+    if docs:
+        flush(docs)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="장소 데이터 전체를 검색 인덱스에 일괄 업로드")
+    parser.add_argument("--embed-batch-size", type=int, default=256, help="임베딩 요청 1회당 입력 개수")
+    parser.add_argument("--upload-batch-size", type=int, default=500, help="업로드 요청 1회당 문서 개수")
+    parser.add_argument("--retries", type=int, default=3, help="배치별 재시도 횟수")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    places = load_places()
+    report = index_places(
+        places,
+        embed_batch_size=args.embed_batch_size,
+        upload_batch_size=args.upload_batch_size,
+        retries=args.retries
+    )
+    print(f"총 {len(places)}개 중 {report['indexed']}개 색인 완료 "
+          f"({report['batches']}개 배치, {time.perf_counter() - start:.1f}초)")
+    if report["failed"]:
+        print(f"실패한 문서 id: {report['failed']}")
@@ -0,0 +1,129 @@
+# context_builder.py
+"""프롬프트 토큰 예산 관리 - 로컬 토크나이저로 세고, 검색 결과를 중복 제거/정렬해서 예산 안에 담음
+
+호출 위치별 예산은 환경 변수 TOKEN_BUDGET_<이름>으로 조정 (예: TOKEN_BUDGET_RAG_CONTEXT=800)
+"""
+import os
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# tiktoken 인코딩 (gpt-4.1/gpt-4o 계열은 o200k_base)
+TOKENIZER_ENCODING = os.getenv("TOKENIZER_ENCODING", "o200k_base")
+
+# 호출 위치 → 최대 토큰 수
+TOKEN_BUDGETS = {
+    "rag_context": int(os.getenv("TOKEN_BUDGET_RAG_CONTEXT", "1500")),          # chat_with_rag 참고 정보
+    "structure_input": int(os.getenv("TOKEN_BUDGET_STRUCTURE_INPUT", "3000")),  # structure_response 원본 답변
+    "user_input": int(os.getenv("TOKEN_BUDGET_USER_INPUT", "500")),             # 사용자 입력
+}
+
+TRUNCATION_MARK = " …"
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """tiktoken 인코딩 (처음 한 번 로드) - 설치되지 않았거나 인코딩 파일을 받을 수 없으면 False"""
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
+
+                    _encoding = tiktoken.get_encoding(TOKENIZER_ENCODING)
+                except Exception:
+                    _encoding = False
+    return _encoding
+
+
+def _approximate_tokens(text: str) -> int:
+    # 토크나이저를 쓸 수 없을 때: 영문/숫자는 4자당 1토큰, 한글 등은 글자당 1토큰 (넉넉하게 잡음)
+    ascii_chars = sum(1 for char in text if ord(char) < 128)
+    return -(-ascii_chars // 4) + (len(text) - ascii_chars)
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text, disallowed_special=()))
+    return _approximate_tokens(text)
+
+
+def count_message_tokens(messages) -> int:
+    """chat 메시지 목록의 대략적인 프롬프트 토큰 수 (메시지당 형식 토큰 4개 포함)"""
+    return sum(count_tokens(message["content"]) + 4 for message in messages) + 2
+
+
+def get_budget(site: str, budget: int = None) -> int:
+    """호출 위치의 토큰 예산 (budget을 직접 주면 그 값)"""
+    return budget if budget is not None else TOKEN_BUDGETS[site]
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """max_tokens를 넘으면 앞부분만 남기고 잘랐다는 표시를 붙임"""
+    if count_tokens(text) <= max_tokens:
+        return text
+    limit = max(max_tokens - count_tokens(TRUNCATION_MARK), 0)
+    encoding = _get_encoding()
+    if encoding:
+        head = encoding.decode(encoding.encode(text, disallowed_special=())[:limit])
+    else:
+        # 근사 토큰 수는 길이에 단조 증가하므로 이분 탐색으로 들어가는 최대 길이를 찾음
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if _approximate_tokens(text[:middle]) <= limit:
+                low = middle
+            else:
+                high = middle - 1
+        head = text[:low]
+    return head.rstrip() + TRUNCATION_MARK
+
+
+def _normalize_chunk(text: str) -> str:
+    return " ".join(str(text).split())
+
+
+def build_context(chunks, max_tokens: int, separator: str = "\n") -> dict:
+    """검색 결과를 예산 안의 참고 정보 문자열로
+
+    chunks: (텍스트, 점수) 목록 - 점수 높은 순으로 담고, 이미 담은 청크에 포함된 내용은 건너뜀
+    반환: {"text", "tokens", "used", "dropped"}
+    """
+    ranked = sorted(
+        ((_normalize_chunk(text), score) for text, score in chunks if text and str(text).strip()),
+        key=lambda chunk: chunk[1],
+        reverse=True
+    )
+    unique = []
+    for text, _ in ranked:
+        if not any(text in kept for kept in unique):
+            unique.append(text)
+
+    selected, used_tokens = [], 0
+    separator_tokens = count_tokens(separator)
+    for text in unique:
+        cost = count_tokens(text) + (separator_tokens if selected else 0)
+        if used_tokens + cost <= max_tokens:
+            selected.append(text)
+            used_tokens += cost
+            continue
+        if not selected:
+            # 가장 관련 높은 청크 하나가 예산보다 크면 잘라서라도 담음
+            selected.append(truncate_to_tokens(text, max_tokens))
+        break
+
+    text = separator.join(selected)
+    return {
+        "text": text,
+        "tokens": count_tokens(text),
+        "used": len(selected),
+        "dropped": len(ranked) - len(selected),
+    }
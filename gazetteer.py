@@ -0,0 +1,107 @@
+# gazetteer.py
+import threading
+
+from place_store import get_place_store
+
+# 자주 쓰는 별칭 → 장소 저장소의 이름
+ALIASES = {
+    "남산타워": "N서울타워",
+    "남산서울타워": "N서울타워",
+    "서울타워": "N서울타워",
+    "명동": "명동거리",
+    "홍대": "홍대패션거리",
+    "홍대입구": "홍대패션거리",
+    "인사동": "인사동 문화의거리",
+    "해운대": "해운대해수욕장",
+    "광안리": "광안리해수욕장",
+    "무등산": "무등산국립공원",
+    "경포대": "관동팔경녹색경관길 경포대와호수길",
+    "북촌한옥마을": "서울도보관광코스 북촌한옥마을",
+    "청계천": "청계천매화거리",
+    "압구정": "압구정로데오거리",
+    "롯데월드타워": "서울스카이",
+}
+
+# 한 글자 키는 오탐이 많아서 제외
+MIN_KEY_LENGTH = 2
+
+
+def normalize_key(text: str) -> str:
+    """공백 무시, 영문 소문자로 비교"""
+    return "".join(str(text).split()).lower()
+
+
+class Gazetteer:
+    """장소 이름/별칭 트라이 - 문장 안에서 가장 긴 장소 이름을 LLM 호출 없이 찾음"""
+
+    def __init__(self, names=(), aliases=None):
+        self._root = {}
+        self._lock = threading.Lock()
+        self.matches = 0
+        self.fallbacks = 0
+        for name in names:
+            self.add(name)
+        for alias, name in (aliases or {}).items():
+            self.add(alias, name)
+
+    def add(self, key: str, name: str = None):
+        """key(이름 또는 별칭)를 만나면 name(없으면 key)을 반환하도록 등록"""
+        normalized = normalize_key(key)
+        if len(normalized) < MIN_KEY_LENGTH:
+            return
+        with self._lock:
+            node = self._root
+            for char in normalized:
+                node = node.setdefault(char, {})
+            node[None] = name or key
+
+    def add_places(self, places):
+        """장소 저장소 listener - 새로 저장된 장소 이름 등록"""
+        for place in places:
+            self.add(place["name"])
+
+    def find(self, text: str):
+        """문장에서 가장 긴 일치 항목의 장소 이름 반환 (없으면 None)"""
+        normalized = normalize_key(text)
+        best, best_length = None, 0
+        for start in range(len(normalized)):
+            node = self._root
+            for end in range(start, len(normalized)):
+                node = node.get(normalized[end])
+                if node is None:
+                    break
+                if None in node and end - start + 1 > best_length:
+                    best, best_length = node[None], end - start + 1
+        return best
+
+    def match(self, text: str):
+        """find()와 같지만 일치/폴백 횟수를 집계"""
+        name = self.find(text)
+        if name is None:
+            self.fallbacks += 1
+        else:
+            self.matches += 1
+        return name
+
+    def stats(self) -> dict:
+        total = self.matches + self.fallbacks
+        return {
+            "matches": self.matches,
+            "fallbacks": self.fallbacks,
+            "match_rate": self.matches / total if total else 0.0,
+        }
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    """장소 저장소 + 별칭으로 만든 Gazetteer 싱글톤 (새 장소가 저장되면 자동 반영)"""
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            store = get_place_store()
+            _gazetteer = Gazetteer((place["name"] for place in store.all()), ALIASES)
+            store.add_listener(_gazetteer.add_places)
+    return _gazetteer
@@ -0,0 +1,195 @@
+# index_sync.py
+"""장소 저장소 → 검색 인덱스 증분 동기화 명령
+
+장소의 검색 문서 내용 해시를 매니페스트(id, 내용 해시, 임베딩 모델, 마지막 색인 시각)와 비교해서
+새로 생겼거나 바뀐 장소만 임베딩/업로드하고, 저장소에서 사라진 장소는 인덱스에서 삭제한다.
+매니페스트는 업로드 배치마다 커밋하므로 중간에 멈춰도 다시 실행하면 남은 부분부터 이어서 진행한다.
+기록은 색인 대상(RAG_BACKEND와 인덱스 이름)별로 따로 두므로, local로 올린 장소가 Azure 인덱스에 올라간 것으로 취급되지 않는다.
+
+사용법:
+    python index_sync.py             # 변경분만 반영
+    python index_sync.py --dry-run   # 반영할 변경 목록만 출력
+    python index_sync.py --full      # 내용이 같아도 전체 다시 색인
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from dotenv import load_dotenv
+
+from bulk_index import index_places
+from place_store import make_safe_id
+from utils import AZURE_SEARCH_INDEX_NAME, EMBEDDING_DEPLOYMENT_NAME, RAG_BACKEND, delete_documents_from_search, load_places
+from utils import make_search_document
+
+load_dotenv()
+
+INDEX_MANIFEST_PATH = os.getenv("INDEX_MANIFEST_PATH", "index_manifest.sqlite3")
+
+
+def content_hash(place) -> str:
+    """검색 문서에 들어가는 필드(이름/설명/주소/URL)만의 내용 해시
+
+    nearby, 좌표, 운영시간처럼 검색 문서에 없는 필드가 바뀌어도 다시 임베딩/업로드하지 않음
+    """
+    document = make_search_document(place, None)
+    del document["contentVector"]
+    payload = json.dumps(document, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def index_target() -> str:
+    """현재 설정의 색인 대상 이름 - 'local' 또는 'azure:<인덱스 이름>'"""
+    return "local" if RAG_BACKEND == "local" else f"azure:{AZURE_SEARCH_INDEX_NAME}"
+
+
+class IndexManifest:
+    """검색 인덱스에 올라간 장소 기록 (SQLite) - target(색인 대상)별로 따로 기록"""
+
+    def __init__(self, path: str = INDEX_MANIFEST_PATH, target: str = None):
+        self.path = path
+        self.target = target or index_target()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS index_manifest ("
+            "target TEXT NOT NULL, id TEXT NOT NULL, content_hash TEXT NOT NULL, embedding_model TEXT NOT NULL, "
+            "indexed_at REAL NOT NULL, PRIMARY KEY (target, id))"
+        )
+        self._conn.commit()
+
+    def entries(self) -> dict:
+        """{id: (내용 해시, 임베딩 모델)}"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, content_hash, embedding_model FROM index_manifest WHERE target = ?", (self.target,)
+            ).fetchall()
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    def record(self, places, embedding_model: str):
+        """색인에 성공한 장소 기록"""
+        now = time.time()
+        rows = [
+            (self.target, make_safe_id(place["name"]), content_hash(place), embedding_model or "", now)
+            for place in places
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO index_manifest VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+
+    def remove(self, doc_ids):
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM index_manifest WHERE target = ? AND id = ?", [(self.target, doc_id) for doc_id in doc_ids]
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM index_manifest WHERE target = ?", (self.target,)
+            ).fetchone()[0]
+
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def get_manifest() -> IndexManifest:
+    """프로세스 공용 매니페스트 (색인 큐도 같은 매니페스트에 기록)"""
+    global _manifest
+    if _manifest is None:
+        with _manifest_lock:
+            if _manifest is None:
+                _manifest = IndexManifest()
+    return _manifest
+
+
+def plan_sync(places, manifest_entries: dict, embedding_model: str) -> dict:
+    """저장소와 매니페스트 비교 - {"new": [장소], "changed": [장소], "deleted": [id], "unchanged": 개수}"""
+    plan = {"new": [], "changed": [], "deleted": [], "unchanged": 0}
+    current_ids = set()
+    for place in places:
+        doc_id = make_safe_id(place["name"])
+        current_ids.add(doc_id)
+        entry = manifest_entries.get(doc_id)
+        if entry is None:
+            plan["new"].append(place)
+        elif entry != (content_hash(place), embedding_model or ""):
+            plan["changed"].append(place)
+        else:
+            plan["unchanged"] += 1
+    plan["deleted"] = [doc_id for doc_id in manifest_entries if doc_id not in current_ids]
+    return plan
+
+
+def sync_index(manifest: IndexManifest = None, embed_batch_size=256, upload_batch_size=500, retries=3,
+               dry_run=False, full=False) -> dict:
+    """변경분만 검색 인덱스에 반영하고 결과 요약 반환 (full=True면 남아 있는 장소 전체를 변경으로 취급)"""
+    manifest = manifest or get_manifest()
+    entries = manifest.entries()
+    if full:
+        entries = {doc_id: (None, None) for doc_id in entries}
+    plan = plan_sync(load_places(), entries, EMBEDDING_DEPLOYMENT_NAME)
+    report = {
+        "new": len(plan["new"]),
+        "changed": len(plan["changed"]),
+        "deleted": len(plan["deleted"]),
+        "unchanged": plan["unchanged"],
+        "indexed": 0,
+        "removed": 0,
+        "failed": []
+    }
+    if dry_run:
+        return report
+
+    # 업로드 배치 단위로 매니페스트에 기록 - 중단되면 기록된 배치까지는 다음 실행에서 건너뜀
+    pending = plan["new"] + plan["changed"]
+    for i in range(0, len(pending), upload_batch_size):
+        chunk = pending[i:i + upload_batch_size]
+        result = index_places(chunk, embed_batch_size=embed_batch_size, upload_batch_size=upload_batch_size, retries=retries)
+        failed = set(result["failed"])
+        manifest.record([place for place in chunk if make_safe_id(place["name"]) not in failed], EMBEDDING_DEPLOYMENT_NAME)
+        report["indexed"] += result["indexed"]
+        report["failed"].extend(result["failed"])
+
+    for i in range(0, len(plan["deleted"]), upload_batch_size):
+        chunk = plan["deleted"][i:i + upload_batch_size]
+        try:
+            failed = set(delete_documents_from_search(chunk))
+        except Exception as e:
+            print(f"[삭제 {i + 1}-{i + len(chunk)}] 오류: {e}")
+            failed = set(chunk)
+        manifest.remove([doc_id for doc_id in chunk if doc_id not in failed])
+        report["removed"] += len(chunk) - len(failed)
+        report["failed"].extend(failed)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="장소 저장소의 변경분만 검색 인덱스에 반영")
+    parser.add_argument("--embed-batch-size", type=int, default=256, help="임베딩 요청 1회당 입력 개수")
+    parser.add_argument("--upload-batch-size", type=int, default=500, help="업로드 요청 1회당 문서 개수 (매니페스트 기록 단위)")
+    parser.add_argument("--retries", type=int, default=3, help="배치별 재시도 횟수")
+    parser.add_argument("--dry-run", action="store_true", help="반영하지 않고 변경 개수만 출력")
+    parser.add_argument("--full", action="store_true", help="내용이 같아도 전체 다시 색인 (삭제된 장소 정리는 동일)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = sync_index(
+        embed_batch_size=args.embed_batch_size,
+        upload_batch_size=args.upload_batch_size,
+        retries=args.retries,
+        dry_run=args.dry_run,
+        full=args.full
+    )
+    print(f"[{index_target()}] 신규 {report['new']}개, 변경 {report['changed']}개, 삭제 {report['deleted']}개, 그대로 {report['unchanged']}개")
+    if not args.dry_run:
+        print(f"{report['indexed']}개 색인, {report['removed']}개 삭제 완료 ({time.perf_counter() - start:.1f}초)")
+    if report["failed"]:
+        print(f"실패한 문서 id (다음 실행에서 다시 시도): {report['failed']}")
@@ -0,0 +1,106 @@
+# indexing_queue.py
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from bulk_index import index_places
+from index_sync import get_manifest
+from kakaoAPI import save_many_to_json
+from place_store import make_safe_id
+from utils import EMBEDDING_DEPLOYMENT_NAME
+import tracing
+
+
+class IndexingQueue:
+    """새 장소 저장/임베딩/업로드를 백그라운드에서 모아서 처리하는 write-behind 큐"""
+
+    def __init__(self, batch_size: int = 32, flush_interval: float = 2.0, retries: int = 3):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.indexed = 0
+        self.failed = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def put(self, place):
+        """장소(Kakao 검색 결과 형식)를 색인 대기열에 추가"""
+        self._ensure_worker()
+        self._queue.put(place)
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="indexing-queue", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        """첫 항목이 들어오면 batch_size개가 모이거나 flush_interval이 지날 때까지 모음
+
+        (id별로 중복 제거한 장소 dict, 큐에서 꺼낸 항목 수) 반환
+        """
+        batch = {}
+        place = self._queue.get()
+        batch[make_safe_id(place["name"])] = place
+        taken = 1
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                place = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch[make_safe_id(place["name"])] = place  # 같은 장소는 한 번만
+            taken += 1
+        return batch, taken
+
+    def _run(self):
+        while True:
+            batch, taken = self._next_batch()
+            try:
+                self._process(list(batch.values()))
+            except Exception as e:
+                self.failed += len(batch)
+                tracing.log_event("indexing_batch_failed", logging.ERROR, force=True, places=len(batch),
+                                  error=f"{type(e).__name__}: {e}")
+            finally:
+                for _ in range(taken):
+                    self._queue.task_done()
+
+    def _process(self, places):
+        # 색인/매니페스트 모두 저장소에 실제로 들어간 레코드 기준 (index_sync.py의 내용 해시와 같아야 다시 올리지 않음)
+        places = save_many_to_json(places)
+        report = index_places(places, embed_batch_size=self.batch_size, upload_batch_size=self.batch_size, retries=self.retries)
+        failed = set(report["failed"])
+        get_manifest().record([place for place in places if make_safe_id(place["name"]) not in failed], EMBEDDING_DEPLOYMENT_NAME)
+        self.indexed += report["indexed"]
+        self.failed += len(report["failed"])
+        if report["failed"]:
+            tracing.log_event("indexing_upload_failed", logging.WARNING, force=True, ids=report["failed"])
+
+    def join(self, timeout: float = None):
+        """대기 중인 장소를 모두 처리할 때까지 대기 (timeout 초 안에 끝나면 True)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def stats(self) -> dict:
+        return {"pending": self._queue.qsize(), "indexed": self.indexed, "failed": self.failed}
+
+
+indexing_queue = IndexingQueue(
+    batch_size=int(os.getenv("INDEXING_BATCH_SIZE", "32")),
+    flush_interval=float(os.getenv("INDEXING_FLUSH_INTERVAL", "2.0"))
+)
+
+# 프로세스 종료 시 남은 장소를 최대한 반영
+atexit.register(indexing_queue.join, 10)
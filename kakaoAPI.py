@@ -1,64 +1,261 @@
+import asyncio
+import httpx
 import requests
 import os
+import threading
+import time
 from dotenv import load_dotenv
-import json
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from place_store import get_place_store
+from spatial_index import find_nearby, place_coordinates
+from ttl_cache import TTLCache
+import tracing
 
-def search_place(query):
-    load_dotenv()
-    API_KEY = os.getenv("KAKAO_API_KEY")
-    
-    url = "https://dapi.kakao.com/v2/local/search/keyword.json"
-    headers = {"Authorization": f"KakaoAK {API_KEY}"}  # Kakao API는 "KakaoAK {API_KEY}" 형식
-    params = {
-        "query": query,
-        "category_group_code": "AT4",  # 관광명소(관광,문화시설)
-        "size": 1
-    }
+load_dotenv()
+
+class KakaoAPIError(Exception):
+    """Kakao API 호출 실패 (쿼터 초과, 인증 오류, 네트워크 오류 등) - '장소 없음'과 구분"""
+
+
+class TokenBucket:
+    """클라이언트 측 요청 속도 제한 - 초당 rate개씩 채워지고 최대 capacity개까지 몰아서 사용 가능"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """토큰이 있으면 하나 쓰고 0, 없으면 다음 토큰까지 기다려야 할 시간(초) 반환"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, max_wait: float = 5.0) -> bool:
+        """토큰 하나를 얻을 때까지 대기 - max_wait 안에 못 얻으면 False"""
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self._take()
+            if not wait:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    async def aacquire(self, max_wait: float = 5.0) -> bool:
+        """acquire()의 비동기 버전 - 기다리는 동안 이벤트 루프를 막지 않음"""
+        deadline = time.monotonic() + max_wait
+        while True:
+            wait = self._take()
+            if not wait:
+                return True
+            if time.monotonic() + wait > deadline:
+                return False
+            await asyncio.sleep(wait)
 
-    res = requests.get(url, headers=headers, params=params)  # set이 아니라 get 사용
-    result = res.json()
 
-    if result.get("documents"):
-        place = result["documents"][0]
+class KakaoLocalClient:
+    """Kakao Local 키워드 검색 클라이언트 - 커넥션 재사용, 타임아웃, 재시도, 속도 제한, 응답 캐시"""
+
+    URL = "https://dapi.kakao.com/v2/local/search/keyword.json"
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        api_key: str = None,
+        timeout=(3.05, 10),
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        daily_quota: int = 100000,
+        burst: int = 20,
+        cache_ttl: float = 86400,
+        cache_size: int = 4096,
+        pool_size: int = 10
+    ):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        self.session.headers["Authorization"] = f"KakaoAK {api_key or os.getenv('KAKAO_API_KEY')}"  # Kakao API는 "KakaoAK {API_KEY}" 형식
+        self._async_session = None
+        self._async_loop = None
+        retry = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUS,
+            allowed_methods=frozenset(["GET"]),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # 하루 쿼터를 고르게 나눈 속도로 토큰을 채움
+        self.limiter = TokenBucket(rate=daily_quota / 86400, capacity=burst)
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+
+    @staticmethod
+    def _params(query, category_group_code, size):
         return {
+            "query": query,
+            "category_group_code": category_group_code,  # AT4: 관광명소(관광,문화시설)
+            "size": size
+        }
+
+    def search_keyword(self, query: str, category_group_code: str = "AT4", size: int = 1):
+        """키워드 검색 결과 documents 목록 반환 (결과가 없으면 빈 목록, 호출 실패는 KakaoAPIError)"""
+        key = (query, category_group_code, size)
+        documents = self.cache.get(key)
+        tracing.record_cache("kakao", documents is not None)
+        if documents is not None:
+            return documents
+
+        if not self.limiter.acquire():
+            raise KakaoAPIError("Kakao API 요청 한도(클라이언트 속도 제한)를 초과했습니다.")
+
+        with tracing.span("kakao.search", query=query) as span:
+            try:
+                res = self.session.get(self.URL, params=self._params(*key), timeout=self.timeout)
+            except requests.RequestException as e:
+                raise KakaoAPIError(f"Kakao API 요청 실패: {e}") from e
+            span.set(status=res.status_code)
+        if res.status_code != 200:
+            raise KakaoAPIError(f"Kakao API 오류 {res.status_code}: {res.text}")
+
+        documents = res.json().get("documents", [])
+        self.cache.set(key, documents)
+        return documents
+
+    def _get_async_session(self) -> httpx.AsyncClient:
+        """현재 이벤트 루프용 httpx.AsyncClient (루프가 바뀌면 새로 생성)"""
+        loop = asyncio.get_running_loop()
+        if self._async_session is None or self._async_loop is not loop:
+            connect, read = self.timeout
+            self._async_session = httpx.AsyncClient(
+                headers={"Authorization": self.session.headers["Authorization"]},
+                timeout=httpx.Timeout(read, connect=connect),
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+            )
+            self._async_loop = loop
+        return self._async_session
+
+    async def asearch_keyword(self, query: str, category_group_code: str = "AT4", size: int = 1):
+        """search_keyword()의 비동기 버전 - 캐시/속도 제한은 동기 버전과 공유"""
+        key = (query, category_group_code, size)
+        documents = self.cache.get(key)
+        tracing.record_cache("kakao", documents is not None)
+        if documents is not None:
+            return documents
+
+        if not await self.limiter.aacquire():
+            raise KakaoAPIError("Kakao API 요청 한도(클라이언트 속도 제한)를 초과했습니다.")
+
+        session = self._get_async_session()
+        with tracing.span("kakao.search", query=query) as span:
+            for attempt in range(self.max_retries + 1):
+                delay = self.backoff_factor * (2 ** attempt)  # urllib3 Retry와 같은 지수 백오프
+                try:
+                    res = await session.get(self.URL, params=self._params(*key))
+                except httpx.HTTPError as e:
+                    if attempt == self.max_retries:
+                        raise KakaoAPIError(f"Kakao API 요청 실패: {e}") from e
+                else:
+                    if res.status_code not in self.RETRY_STATUS or attempt == self.max_retries:
+                        break
+                    retry_after = res.headers.get("Retry-After", "")
+                    if retry_after.isdigit():
+                        delay = float(retry_after)
+                await asyncio.sleep(delay)
+            span.set(status=res.status_code, attempts=attempt + 1)
+        if res.status_code != 200:
+            raise KakaoAPIError(f"Kakao API 오류 {res.status_code}: {res.text}")
+
+        documents = res.json().get("documents", [])
+        self.cache.set(key, documents)
+        return documents
+
+    @staticmethod
+    def _to_place(documents):
+        if not documents:
+            return None
+        place = documents[0]
+        result = {
             "name": place["place_name"],
             "description": f"{place['place_name']}은 {place['address_name']}에 위치한 관광명소입니다.",
             "location": place["address_name"],
-            # "lat": place["y"],
-            # "lng": place["x"],
-            # "category": place["category_name"],
+            "category": place.get("category_name", ""),
             "url": place["place_url"]
         }
-    else:
-        print("API 응답:", result)  # 디버깅용 출력
-        return None
+        # 좌표(x: 경도, y: 위도)는 문자열로 옴 - 주변 장소 계산(spatial_index)에 사용
+        try:
+            result["lat"], result["lng"] = float(place["y"]), float(place["x"])
+        except (KeyError, TypeError, ValueError):
+            pass
+        return result
+
+    def search_place(self, query: str):
+        """관광명소 검색 - 첫 번째 결과를 장소 정보 dict로 반환 (없으면 None)"""
+        return self._to_place(self.search_keyword(query))
+
+    async def asearch_place(self, query: str):
+        return self._to_place(await self.asearch_keyword(query))
+
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_kakao_client() -> KakaoLocalClient:
+    """프로세스 전체에서 공유하는 Kakao 클라이언트"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = KakaoLocalClient(
+                daily_quota=int(os.getenv("KAKAO_DAILY_QUOTA", "100000")),
+                burst=int(os.getenv("KAKAO_BURST", "20")),
+                cache_ttl=float(os.getenv("KAKAO_CACHE_TTL", "86400"))
+            )
+    return _client
+
+def search_place(query):
+    return get_kakao_client().search_place(query)
+
+async def asearch_place(query):
+    return await get_kakao_client().asearch_place(query)
 
 
 def format_kakao_place(data):
-    return {
+    place = {
         "name": data["name"],
         "description": data["description"],
         "hours": "",  # 카카오는 운영시간 제공 X, 추론 필요
         "location": data["location"],
         "highlights": [],  # 사진 등도 없음, 수동 추가 or GPT로 추론
-        "nearby": [],      # 추후 확장 가능
+        "nearby": find_nearby(data),  # 저장 시점에 공간 인덱스로 채움 (좌표가 없으면 빈 목록)
         "url": data["url"]
     }
+    if place_coordinates(data) is not None:
+        place.update(lat=data["lat"], lng=data["lng"], category=data.get("category", ""))
+    return place
 
-def save_to_json(place_data, filename="tour_data.json"):
-    if os.path.exists(filename):
-        with open(filename, "r", encoding="utf-8") as f:
-            try:
-                data = json.load(f)
-            except json.JSONDecodeError:
-                data = []
-    else:
-        data = []
-
-    data.append(format_kakao_place(place_data))
+def save_to_json(place_data, store=None):
+    """장소 저장소에 장소 추가/갱신 (같은 이름이면 덮어씀)"""
+    save_many_to_json([place_data], store)
 
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def save_many_to_json(places, store=None):
+    """여러 장소를 한 번의 쓰기로 저장 - 저장소 형식으로 바꾼 레코드 목록 반환 (내용이 같아 쓰지 않은 장소 포함)"""
+    store = store or get_place_store()
+    records = [format_kakao_place(place) for place in places]
+    store.upsert_many(records)
+    return records
 
 # 테스트
 if __name__ == "__main__":
@@ -102,11 +299,16 @@ if __name__ == "__main__":
         "성균관대학교 캠퍼스",
     ]
 
+    results = []
     for place in place_names:
         result = search_place(place)    
         if result:
-            save_to_json(result)
-            print(f"관광지 정보 '{result['name']}'가 JSON 파일에 저장되었습니다.")
+            results.append(result)
+            print(f"관광지 정보 '{result['name']}'를 찾았습니다.")
         else:
             print(f"'{place}'에 대한 정보를 찾을 수 없습니다.")
-        print(result)
\ No newline at end of file
+        print(result)
+
+    # 파일은 마지막에 한 번만 저장
+    save_many_to_json(results)
+    print(f"{len(results)}개 관광지 정보가 장소 저장소에 저장되었습니다. 검색 인덱스 반영: python bulk_index.py")
\ No newline at end of file
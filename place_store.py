@@ -0,0 +1,186 @@
+# place_store.py
+import base64
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl  # 여러 프로세스(Streamlit 워커 등) 간 파일 잠금 - Linux/macOS
+except ImportError:
+    fcntl = None
+
+DEFAULT_PLACE_STORE_PATH = "tour_data.jsonl"
+LEGACY_TOUR_DATA_PATH = "tour_data.json"
+
+
+def make_safe_id(text: str) -> str:
+    encoded = base64.urlsafe_b64encode(text.encode()).decode()
+    return encoded.rstrip("=")  # padding 제거
+
+
+class PlaceStore:
+    """append-only JSONL 장소 저장소
+
+    - 한 줄에 장소 하나, 같은 id(make_safe_id(name))는 나중에 쓴 줄이 우선 (upsert)
+    - 메모리에 id → 장소 인덱스를 두고 조회는 O(1), 추가는 파일 끝에 한 줄만 씀
+    - 쓰기는 잠금 파일(flock)로 프로세스 간 직렬화, 다른 프로세스가 쓴 줄은 refresh()로 반영
+    """
+
+    def __init__(self, path: str = DEFAULT_PLACE_STORE_PATH, legacy_path: str = LEGACY_TOUR_DATA_PATH):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._places = {}
+        self._offset = 0
+        self._inode = None
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._migrate_legacy()
+        self.refresh()
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.path + ".lock", "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _migrate_legacy(self):
+        """기존 tour_data.json(JSON 배열)을 한 번만 JSONL로 옮김 (중복 이름은 마지막 항목 사용)"""
+        if os.path.exists(self.path) or not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        with self._file_lock(exclusive=True):
+            if os.path.exists(self.path):
+                return
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
+                try:
+                    data = json.load(f)
+                except json.JSONDecodeError:
+                    data = []
+            places = {make_safe_id(place["name"]): place for place in data}
+            self._write_all(places.values())
+
+    def _write_all(self, places):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for place in places:
+                f.write(json.dumps(place, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _read_new_lines(self):
+        """마지막으로 읽은 위치 이후의 줄만 읽어 인덱스에 반영 (파일이 교체됐으면 처음부터)"""
+        if not os.path.exists(self.path):
+            return
+        stat = os.stat(self.path)
+        if stat.st_ino != self._inode or stat.st_size < self._offset:
+            self._places = {}
+            self._offset = 0
+            self._inode = stat.st_ino
+        if stat.st_size == self._offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # 아직 쓰는 중인 줄은 다음에 읽음
+                self._offset += len(line)
+                if line.strip():
+                    place = json.loads(line)
+                    self._places[make_safe_id(place["name"])] = place
+
+    def refresh(self):
+        with self._file_lock(exclusive=False):
+            self._read_new_lines()
+
+    def get(self, name: str):
+        """이름으로 장소 조회 (없으면 None)"""
+        return self.get_by_id(make_safe_id(name))
+
+    def get_by_id(self, place_id: str):
+        self.refresh()
+        with self._lock:
+            return self._places.get(place_id)
+
+    def all(self):
+        self.refresh()
+        with self._lock:
+            return list(self._places.values())
+
+    def __len__(self):
+        return len(self._places)
+
+    def add_listener(self, listener):
+        """이 프로세스에서 장소가 추가/갱신될 때마다 listener(바뀐 장소 목록) 호출"""
+        self._listeners.append(listener)
+
+    def upsert(self, place) -> bool:
+        """장소 추가/갱신 - 내용이 같으면 쓰지 않고 False 반환"""
+        return bool(self.upsert_many([place]))
+
+    def upsert_many(self, places):
+        """여러 장소를 한 번의 잠금/쓰기로 추가/갱신 - 실제로 바뀐 장소 목록 반환"""
+        with self._file_lock(exclusive=True):
+            self._read_new_lines()
+            changed = {}
+            for place in places:
+                place_id = make_safe_id(place["name"])
+                if self._places.get(place_id) != place:
+                    changed[place_id] = place
+            if changed:
+                with open(self.path, "ab") as f:
+                    f.write("".join(json.dumps(place, ensure_ascii=False) + "\n" for place in changed.values()).encode("utf-8"))
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._read_new_lines()
+        changed = list(changed.values())
+        if changed:
+            for listener in self._listeners:
+                listener(changed)
+        return changed
+
+    def compact(self):
+        """덮어쓴 줄을 제거해 파일을 장소당 한 줄로 다시 씀"""
+        with self._file_lock(exclusive=True):
+            self._read_new_lines()
+            self._write_all(self._places.values())
+            self._places = {}
+            self._offset = 0
+            self._read_new_lines()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+_store_listeners = []  # 모든 저장소에 등록할 listener (저장소가 만들어질 때 등록)
+
+
+def add_store_listener(listener):
+    """이미 열린 저장소와 앞으로 열릴 저장소 모두에 listener 등록 - 저장소를 열지 않으므로 import 시점에 호출해도 됨"""
+    with _stores_lock:
+        _store_listeners.append(listener)
+        for store in _stores.values():
+            store.add_listener(listener)
+
+
+def get_place_store(path: str = None, legacy_path: str = None) -> PlaceStore:
+    """경로별 PlaceStore 싱글톤 (기본 경로는 PLACE_STORE_PATH 환경 변수)
+
+    legacy_path: 처음 만들 때 JSONL로 옮길 기존 JSON 배열 파일 (기본 경로면 LEGACY_TOUR_DATA_PATH 환경 변수)
+    """
+    if path is None:
+        path = os.getenv("PLACE_STORE_PATH", DEFAULT_PLACE_STORE_PATH)
+        legacy_path = legacy_path or os.getenv("LEGACY_TOUR_DATA_PATH", LEGACY_TOUR_DATA_PATH)
+    with _stores_lock:
+        if path not in _stores:
+            store = PlaceStore(path, legacy_path=legacy_path)
+            for listener in _store_listeners:
+                store.add_listener(listener)
+            _stores[path] = store
+        return _stores[path]
@@ -0,0 +1,122 @@
+# resources.py
+"""프로세스 전체에서 공유하는 외부 클라이언트/그래프 - 처음 사용할 때 한 번만 생성
+
+openai, azure-search, langchain 같은 무거운 SDK import도 생성 시점으로 미뤄서
+모듈 import(콜드 스타트) 비용을 줄인다. 측정: python benchmarks/startup.py
+"""
+import os
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+_instances = {}
+_lock = threading.RLock()  # 그래프 생성 중에 LLM 클라이언트를 만드는 등 중첩 생성 허용
+
+
+def get_resource(name: str, factory):
+    """name으로 등록된 인스턴스 반환 - 없으면 factory()로 한 번만 생성"""
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = factory()
+                _instances[name] = instance
+    return instance
+
+
+def override(name: str, instance):
+    """인스턴스 교체 (테스트/벤치마크에서 가짜 클라이언트 주입용)"""
+    with _lock:
+        _instances[name] = instance
+
+
+def reset(name: str = None):
+    """인스턴스 삭제 - 다음 사용 시 다시 생성"""
+    with _lock:
+        if name is None:
+            _instances.clear()
+        else:
+            _instances.pop(name, None)
+
+
+def _create_openai_client():
+    from openai import AzureOpenAI
+
+    return AzureOpenAI(
+        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+        api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
+    )
+
+
+def _create_search_client():
+    from azure.search.documents import SearchClient
+    from azure.core.credentials import AzureKeyCredential
+
+    return SearchClient(
+        endpoint=os.getenv("AZURE_SEARCH_ENDPOINT"),
+        index_name=os.getenv("AZURE_SEARCH_INDEX_NAME"),
+        credential=AzureKeyCredential(os.getenv("AZURE_SEARCH_API_KEY"))
+    )
+
+
+def _create_async_openai_client():
+    from openai import AsyncAzureOpenAI
+
+    return AsyncAzureOpenAI(
+        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+        api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
+        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
+    )
+
+
+def _create_async_search_client():
+    from azure.search.documents.aio import SearchClient
+    from azure.core.credentials import AzureKeyCredential
+
+    return SearchClient(
+        endpoint=os.getenv("AZURE_SEARCH_ENDPOINT"),
+        index_name=os.getenv("AZURE_SEARCH_INDEX_NAME"),
+        credential=AzureKeyCredential(os.getenv("AZURE_SEARCH_API_KEY"))
+    )
+
+
+def _create_chat_llm():
+    # LLM 세팅 - Azure OpenAI 올바른 설정
+    from langchain_openai import AzureChatOpenAI
+
+    return AzureChatOpenAI(
+        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+        azure_endpoint="https://reality0130-openai-001.openai.azure.com/",
+        deployment_name="dev-gpt-4.1-mini",
+        api_version="2024-10-21",
+        temperature=0
+    )
+
+
+def get_openai_client():
+    """Azure OpenAI 클라이언트 (chat/embeddings)"""
+    return get_resource("openai_client", _create_openai_client)
+
+
+def get_search_client():
+    """Azure AI Search 클라이언트"""
+    return get_resource("search_client", _create_search_client)
+
+
+def get_async_openai_client():
+    """비동기 Azure OpenAI 클라이언트 - 하나의 이벤트 루프(예: API 서버)에서 공유"""
+    return get_resource("async_openai_client", _create_async_openai_client)
+
+
+def get_async_search_client():
+    """비동기 Azure AI Search 클라이언트 - 하나의 이벤트 루프에서 공유"""
+    return get_resource("async_search_client", _create_async_search_client)
+
+
+def get_chat_llm():
+    """ReAct Agent용 LangChain AzureChatOpenAI"""
+    return get_resource("chat_llm", _create_chat_llm)
@@ -0,0 +1,268 @@
+# route_planner.py
+"""여행 일정 동선 계산 - 장소 좌표로 방문 순서와 날짜별 일정을 LLM 없이 만든다
+
+1. 장소 간 거리 행렬 (haversine, NumPy 벡터 연산)
+2. 최근접 이웃으로 초기 순서 → 2-opt로 교차 구간 제거
+3. 하루 시간 예산(이동 + 관람)에 맞춰 날짜별로 나눔
+
+recommend_trip_plan은 이 결과(structured itinerary)를 LLM이 설명만 하도록 넘긴다.
+측정: python benchmarks/routes.py
+"""
+import os
+import re
+
+import numpy as np
+from dotenv import load_dotenv
+
+from gazetteer import normalize_key
+from place_store import get_place_store, make_safe_id
+from spatial_index import EARTH_RADIUS_KM, place_coordinates
+
+load_dotenv()
+
+ROUTE_DAY_MINUTES = int(os.getenv("ROUTE_DAY_MINUTES", "480"))      # 하루 일정 시간 (이동 + 관람)
+ROUTE_VISIT_MINUTES = int(os.getenv("ROUTE_VISIT_MINUTES", "90"))   # 장소당 관람 시간
+ROUTE_SPEED_KMH = float(os.getenv("ROUTE_SPEED_KMH", "25"))         # 도심 평균 이동 속도
+ROUTE_DETOUR_FACTOR = 1.3  # 직선 거리 → 실제 도로 거리 보정
+ROUTE_MAX_STOPS_PER_DAY = int(os.getenv("ROUTE_MAX_STOPS_PER_DAY", "4"))
+ROUTE_DEFAULT_DAYS = int(os.getenv("ROUTE_DEFAULT_DAYS", "1"))          # 질문에 일수가 없을 때 일정 일수
+
+# 'N박M일' / 'N일' / 'N박' - 날짜('8월 15일', '15일에', '15일부터/까지')는 일수로 읽지 않음
+DAYS_PATTERN = re.compile(
+    r"(?<!\d)(\d+)\s*박\s*(\d+)\s*일"
+    r"|(?<!\d)(?<!월)(?<!월\s)(\d+)\s*일(?!\s*(?:에|부터|까지|자))"
+    r"|(?<!\d)(\d+)\s*박"
+)
+REGION_SUFFIXES = ("특별자치도", "특별자치시", "특별시", "광역시", "도", "시", "군", "구")
+
+
+def distance_matrix(coordinates) -> np.ndarray:
+    """(n, 2) 위경도 배열 → (n, n) haversine 거리(km) 행렬"""
+    radians = np.radians(np.asarray(coordinates, dtype=np.float64))
+    lat, lng = radians[:, 0:1], radians[:, 1:2]
+    a = np.sin((lat.T - lat) / 2) ** 2 + np.cos(lat) * np.cos(lat.T) * np.sin((lng.T - lng) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def route_length(order, dist) -> float:
+    order = np.asarray(order)
+    return float(dist[order[:-1], order[1:]].sum()) if len(order) > 1 else 0.0
+
+
+def nearest_neighbor_order(dist, start: int = 0) -> list:
+    """start에서 출발해 아직 가지 않은 가장 가까운 장소로 이동하는 순서"""
+    n = len(dist)
+    visited = np.zeros(n, dtype=bool)
+    order = [start]
+    visited[start] = True
+    for _ in range(n - 1):
+        row = np.where(visited, np.inf, dist[order[-1]])
+        nxt = int(np.argmin(row))
+        order.append(nxt)
+        visited[nxt] = True
+    return order
+
+
+def two_opt(order, dist, max_passes: int = 50) -> list:
+    """열린 경로(출발지로 돌아오지 않음) 2-opt - 구간 [i, j]를 뒤집어 짧아지면 반영, 개선이 없을 때까지 반복
+
+    i마다 모든 j의 변화량을 벡터로 계산해서 가장 많이 줄어드는 뒤집기를 적용한다.
+    """
+    route = np.asarray(order)
+    n = len(route)
+    if n < 4:
+        return route.tolist()
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, n - 1):
+            j = np.arange(i + 1, n)
+            before = dist[route[i - 1], route[i]] + np.where(j < n - 1, dist[route[j], route[np.minimum(j + 1, n - 1)]], 0.0)
+            after = dist[route[i - 1], route[j]] + np.where(j < n - 1, dist[route[i], route[np.minimum(j + 1, n - 1)]], 0.0)
+            delta = after - before
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-9:
+                end = j[best]
+                route[i:end + 1] = route[i:end + 1][::-1]
+                improved = True
+        if not improved:
+            break
+    return route.tolist()
+
+
+def travel_minutes(distance_km: float, speed_kmh: float = ROUTE_SPEED_KMH) -> float:
+    return distance_km * ROUTE_DETOUR_FACTOR / speed_kmh * 60
+
+
+def split_days(order, dist, days: int = None, day_minutes: int = ROUTE_DAY_MINUTES,
+               visit_minutes: int = ROUTE_VISIT_MINUTES, max_stops: int = ROUTE_MAX_STOPS_PER_DAY) -> list:
+    """방문 순서를 날짜별 목록으로 나눔
+
+    days를 주면 순서를 유지한 채 min(days, 장소 수)일로 나누고, 날마다 소요 시간(이동 + 관람)이 전체의 1/days에 가깝게 자름
+    days가 없으면 하루 시간 예산과 최대 장소 수를 넘기 전까지 하루에 담음
+    """
+    legs = [0.0] + [travel_minutes(dist[a, b]) for a, b in zip(order, order[1:])]
+    if days:
+        count = min(days, len(order))
+        # elapsed[j]: j번째 장소 전까지의 누적 소요 시간
+        elapsed = np.cumsum([0.0] + [leg + visit_minutes for leg in legs])
+        cuts = [0]
+        for day in range(1, count):
+            # 남은 날마다 최소 한 곳은 남기면서 누적 시간이 day/count 지점에 가장 가까운 곳에서 자름
+            candidates = range(cuts[-1] + 1, len(order) - (count - day) + 1)
+            cuts.append(min(candidates, key=lambda j: abs(elapsed[j] - elapsed[-1] * day / count)))
+        cuts.append(len(order))
+        return [list(order[start:end]) for start, end in zip(cuts, cuts[1:])]
+
+    schedule, current, used = [], [], 0.0
+    for stop, leg in zip(order, legs):
+        cost = (leg if current else 0.0) + visit_minutes
+        if current and (used + cost > day_minutes or len(current) >= max_stops):
+            schedule.append(current)
+            current, used, cost = [], 0.0, visit_minutes
+        current.append(stop)
+        used += cost
+    if current:
+        schedule.append(current)
+    return schedule
+
+
+def plan_route(places, days: int = None, start: int = 0) -> dict:
+    """좌표가 있는 장소 목록 → 날짜별 일정
+
+    반환: {"days": [{"day", "stops": [{"name", "location", "travel_km", "travel_minutes"}], "travel_km", "minutes"}],
+           "total_km", "stops"}
+    """
+    coordinates = [place_coordinates(place) for place in places]
+    dist = distance_matrix(coordinates)
+    order = two_opt(nearest_neighbor_order(dist, start), dist)
+
+    itinerary = {"days": [], "total_km": round(route_length(order, dist), 2), "stops": len(order)}
+    for number, day in enumerate(split_days(order, dist, days), start=1):
+        stops, travel_km = [], 0.0
+        for index, stop in enumerate(day):
+            leg = float(dist[day[index - 1], stop]) if index else 0.0
+            travel_km += leg
+            stops.append({
+                "name": places[stop]["name"],
+                "location": places[stop].get("location", ""),
+                "travel_km": round(leg, 2),
+                "travel_minutes": round(travel_minutes(leg))
+            })
+        itinerary["days"].append({
+            "day": number,
+            "stops": stops,
+            "travel_km": round(travel_km, 2),
+            "minutes": round(travel_minutes(travel_km) + ROUTE_VISIT_MINUTES * len(stops))
+        })
+    return itinerary
+
+
+def plan_itinerary(place_ids, days: int = None) -> dict:
+    """장소 저장소의 id 목록으로 일정 생성 - 좌표가 없는 장소는 "skipped"에 이름만 남김"""
+    store = get_place_store()
+    places, skipped = [], []
+    for place_id in place_ids:
+        place = store.get_by_id(place_id)
+        if place is None:
+            continue
+        (places if place_coordinates(place) is not None else skipped).append(place)
+    itinerary = plan_route(places, days) if places else {"days": [], "total_km": 0.0, "stops": 0}
+    itinerary["skipped"] = [place["name"] for place in skipped]
+    return itinerary
+
+
+def parse_days(text: str):
+    """'2박3일' → 3, '3일' → 3, '2박' → 3 (없으면 None)
+
+    >>> parse_days("2박 3일 부산 여행"), parse_days("3일 경주 일정"), parse_days("1박 강릉")
+    (3, 3, 2)
+    >>> parse_days("8월 15일 서울 여행 계획"), parse_days("8월15일 경복궁"), parse_days("15일에 출발하는 제주 여행")
+    (None, None, None)
+    >>> parse_days("10월 3일부터 2박3일 부산 여행")
+    3
+    """
+    match = DAYS_PATTERN.search(text)
+    if not match:
+        return None
+    nights_days, days, nights = (match.group(1), match.group(2)), match.group(3), match.group(4)
+    if nights_days[1]:
+        return int(nights_days[1])
+    if days:
+        return int(days)
+    return int(nights) + 1
+
+
+def _region_keys(place):
+    """주소 앞 두 단어로 만든 지역 이름 (예: '경북 경주시' → {'경북', '경주'})
+
+    시/도와 시/군은 접미사를 뗀 이름도 쓰지만, 구는 '수영구' → '수영'처럼 일반 단어와 겹치기 쉬워서 전체 이름만 씀
+    """
+    keys = set()
+    for position, word in enumerate(place.get("location", "").split()[:2]):
+        if not (position == 1 and word.endswith("구")):
+            for suffix in REGION_SUFFIXES:
+                if word.endswith(suffix) and len(word) > len(suffix):
+                    word = word[:-len(suffix)]
+                    break
+        if len(word) >= 2:
+            keys.add(normalize_key(word))
+    return keys
+
+
+def closest_group(coordinates, size: int) -> list:
+    """서로 가장 가까운 size개 위치의 인덱스 - 중심 후보마다 가까운 size개 거리 합이 가장 작은 묶음"""
+    if len(coordinates) <= size:
+        return list(range(len(coordinates)))
+    dist = distance_matrix(coordinates)
+    nearest = np.argsort(dist, axis=1, kind="stable")[:, :size]
+    costs = np.take_along_axis(dist, nearest, axis=1).sum(axis=1)
+    return sorted(nearest[int(np.argmin(costs))].tolist())
+
+
+def select_trip_places(text: str, limit: int) -> list:
+    """질문에 나온 지역(주소 기준)에서 좌표 있는 장소를 최대 limit개 골라 id 목록 반환 - 지역이 없으면 빈 목록
+
+    지역 장소가 limit개보다 많으면 저장 순서가 아니라 서로 가장 가까운 묶음을 고름 (하루 동선이 짧아짐)
+    """
+    normalized = normalize_key(text)
+    candidates = [
+        place for place in get_place_store().all()
+        if place_coordinates(place) is not None and any(key in normalized for key in _region_keys(place))
+    ]
+    chosen = closest_group([place_coordinates(place) for place in candidates], limit) if candidates else []
+    return [make_safe_id(candidates[index]["name"]) for index in chosen]
+
+
+def trip_scope(text: str):
+    """답변 캐시 범위 - (질문에 나온 지역 이름들, 일수). '3일 부산'과 '4일 부산'은 다른 범위"""
+    normalized = normalize_key(text)
+    regions = {key for place in get_place_store().all() for key in _region_keys(place) if key in normalized}
+    return tuple(sorted(regions)), parse_days(text)
+
+
+def itinerary_place_ids(itinerary) -> list:
+    """일정에 들어간 장소 id 목록 (답변 캐시 무효화용)"""
+    return [make_safe_id(stop["name"]) for day in itinerary["days"] for stop in day["stops"]]
+
+
+def plan_for_request(text: str):
+    """여행 계획 질문 → 일정 (지역 장소가 2곳 미만이면 None) - 일수가 없으면 ROUTE_DEFAULT_DAYS일 분량만 고름"""
+    days = parse_days(text)
+    place_ids = select_trip_places(text, (days or ROUTE_DEFAULT_DAYS) * ROUTE_MAX_STOPS_PER_DAY)
+    if len(place_ids) < 2:
+        return None
+    return plan_itinerary(place_ids, days)
+
+
+def format_itinerary(itinerary) -> str:
+    """LLM에 넘길 일정 요약 (날짜별 방문 순서와 이동 거리/시간)"""
+    lines = [f"총 {itinerary['stops']}곳, 총 이동 거리 약 {itinerary['total_km']:.1f}km"]
+    for day in itinerary["days"]:
+        stops = " → ".join(
+            f"{stop['name']}" + (f"({stop['travel_km']:.1f}km, 약 {stop['travel_minutes']}분)" if stop["travel_km"] else "")
+            for stop in day["stops"]
+        )
+        lines.append(f"Day{day['day']}: {stops}")
+    if itinerary.get("skipped"):
+        lines.append(f"좌표가 없어 동선에서 뺀 장소: {', '.join(itinerary['skipped'])}")
+    return "\n".join(lines)
@@ -0,0 +1,97 @@
+# semantic_cache.py
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+import tracing
+from vector_index import LocalVectorIndex, cosine_to_search_score
+
+
+class SemanticCache:
+    """질의 임베딩 유사도 기반 응답 캐시 - 도구별로 (질의 벡터, 답변)을 저장하고 비슷한 질의에 재사용
+
+    scope(장소 id, (지역, 일수) 등)를 주면 같은 scope 안에서만 비교한다.
+    문장 모양이 같고 장소만 다른 질문("경복궁 정보" / "창덕궁 정보")은 벡터가 매우 비슷해서 scope로 나눠야 섞이지 않는다.
+    """
+
+    def __init__(self, threshold: float = 0.97, ttl: float = 21600, max_entries: int = 1000):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+        self._indexes = {}  # (tool, scope) -> LocalVectorIndex
+        self._order = OrderedDict()  # entry id -> (tool, scope) (저장 순서, 가장 오래된 것부터 제거)
+        self._sources = {}  # entry id -> 답변을 만들 때 참고한 문서 id 집합
+        self._ids = itertools.count()
+
+    def lookup(self, tool: str, vector, scope=None):
+        """같은 scope에서 유사도가 threshold 이상이고 만료되지 않은 답변이 있으면 반환, 없으면 None"""
+        min_score = cosine_to_search_score(self.threshold)
+        now = time.time()
+        with self._lock:
+            index = self._indexes.get((tool, scope))
+            for entry in (index.search(vector, k=3) if index else []):
+                if entry["@search.score"] < min_score:
+                    break
+                if now - entry["created_at"] > self.ttl:
+                    self._remove(entry["id"])
+                    continue
+                self.hits += 1
+                self.saved_seconds += entry["elapsed"]
+                tracing.record_cache("semantic", True)
+                tracing.record_cache_savings("semantic", entry["elapsed"])
+                return entry["answer"]
+            self.misses += 1
+            tracing.record_cache("semantic", False)
+            return None
+
+    def store(self, tool: str, vector, answer: str, elapsed: float = 0.0, sources=(), scope=None):
+        """답변 저장 - elapsed는 이 답변을 만드는 데 걸린 시간(캐시 적중 시 절약 시간으로 집계),
+        sources는 답변을 만들 때 참고한 문서 id (그 문서가 바뀌면 invalidate(source=...)로 무효화)"""
+        with self._lock:
+            entry_id = str(next(self._ids))
+            index = self._indexes.setdefault((tool, scope), LocalVectorIndex())
+            index.upsert({
+                "id": entry_id,
+                "answer": answer,
+                "created_at": time.time(),
+                "elapsed": elapsed,
+                "contentVector": vector,
+            })
+            self._order[entry_id] = (tool, scope)
+            self._sources[entry_id] = frozenset(sources)
+            while len(self._order) > self.max_entries:
+                self._remove(next(iter(self._order)))
+
+    def invalidate(self, tool: str = None, source: str = None):
+        """도구의 캐시(또는 전체 캐시) 무효화 - source를 주면 그 문서를 참고해서 만든 답변만"""
+        with self._lock:
+            for entry_id, (entry_tool, _) in list(self._order.items()):
+                if tool is not None and entry_tool != tool:
+                    continue
+                if source is not None and source not in self._sources[entry_id]:
+                    continue
+                self._remove(entry_id)
+
+    def _remove(self, entry_id):
+        self._sources.pop(entry_id, None)
+        key = self._order.pop(entry_id, None)
+        if key is not None:
+            index = self._indexes[key]
+            index.delete(entry_id)
+            if not len(index):
+                del self._indexes[key]  # scope마다 인덱스가 생기므로 빈 인덱스는 정리
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "saved_seconds": self.saved_seconds,
+            "entries": len(self._order),
+        }
@@ -0,0 +1,113 @@
+# single_flight.py
+"""같은 키의 동시 호출 합치기 (single-flight)
+
+진행 중인 계산이 있으면 새로 시작하지 않고 그 결과(또는 Exception)를 같이 받는다.
+결과는 저장하지 않으므로 계산이 끝난 뒤의 호출은 다시 실행된다 (캐시는 각 계층이 따로 담당).
+"""
+import asyncio
+import threading
+
+import tracing
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.abandoned = False  # Exception이 아닌 이유(취소, 인터럽트 등)로 중단됨 - 기다리던 호출이 다시 실행
+
+
+class _AsyncCall:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """키별로 진행 중인 호출을 하나만 실행 - name은 지표 라벨"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.coalesced = 0
+        self._calls = {}         # 동기 호출: key -> _Call
+        self._async_calls = {}   # 비동기 호출: (이벤트 루프, key) -> _AsyncCall
+        self._lock = threading.Lock()
+
+    def _record_coalesced(self):
+        with self._lock:
+            self.coalesced += 1
+        tracing.metrics.inc("travelgenie_singleflight_coalesced_total", help="진행 중인 호출에 합류한 수", flight=self.name)
+        tracing.annotate(coalesced=self.name)
+
+    def in_flight(self, key) -> bool:
+        return key in self._calls
+
+    def do(self, key, func):
+        """func()를 실행하거나, 같은 key로 진행 중인 호출이 있으면 끝날 때까지 기다려 결과 공유
+
+        공유하는 것은 반환값과 Exception뿐이다. 먼저 실행한 호출이 그 밖의 BaseException(KeyboardInterrupt,
+        Streamlit의 rerun/stop 등 호출한 쪽에만 해당하는 신호)으로 끝나면 기다리던 호출 중 하나가 다시 실행한다.
+        """
+        joined = False
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+            if leader:
+                break
+            if not joined:
+                joined = True
+                self._record_coalesced()
+            call.done.wait()
+            if call.abandoned:
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        except BaseException:
+            call.abandoned = True
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def ado(self, key, func):
+        """do()의 비동기 버전 - func는 코루틴 함수
+
+        계산은 별도 Task로 실행해서 먼저 온 호출자가 취소되어도 기다리는 다른 호출자는 결과를 받는다.
+        기다리는 호출자가 모두 취소되면(예: API 시간 제한) 아무도 쓰지 않을 계산이므로 Task도 취소한다.
+        """
+        flight_key = (asyncio.get_running_loop(), key)
+        call = self._async_calls.get(flight_key)
+        if call is None:
+            call = self._async_calls[flight_key] = _AsyncCall(asyncio.ensure_future(func()))
+            call.task.add_done_callback(lambda _: self._forget(flight_key, call))
+        else:
+            self._record_coalesced()
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                # 취소 중인 Task에 새 호출이 합류하지 않도록 먼저 목록에서 뺌
+                self._forget(flight_key, call)
+                call.task.cancel()
+
+    def _forget(self, flight_key, call):
+        if self._async_calls.get(flight_key) is call:
+            del self._async_calls[flight_key]
+
+    def stats(self) -> dict:
+        return {"coalesced": self.coalesced, "in_flight": len(self._calls) + len(self._async_calls)}
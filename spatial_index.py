@@ -0,0 +1,175 @@
+# spatial_index.py
+"""장소 좌표 공간 인덱스 - 위경도 격자 + haversine 거리로 '반경 r km 안의 가까운 장소 k개' 조회
+
+주변 장소는 저장 시점(format_kakao_place)에 채우고, RAG 참고 정보에도 붙여서 LLM이 추측하지 않게 한다.
+
+좌표가 없는 기존 장소 채우기:
+    python spatial_index.py --backfill
+"""
+import argparse
+import math
+import os
+import threading
+
+from dotenv import load_dotenv
+
+from place_store import get_place_store, make_safe_id
+from resources import get_resource
+
+load_dotenv()
+
+NEARBY_RADIUS_KM = float(os.getenv("NEARBY_RADIUS_KM", "3"))
+NEARBY_LIMIT = int(os.getenv("NEARBY_LIMIT", "5"))
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180  # 위도 1도 ≈ 111.2km
+
+
+def haversine_km(lat1, lng1, lat2, lng2) -> float:
+    """두 좌표 사이의 대원 거리(km)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def place_coordinates(place):
+    """장소의 (위도, 경도) - 좌표가 없거나 잘못됐으면 None"""
+    try:
+        lat, lng = float(place["lat"]), float(place["lng"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+class SpatialIndex:
+    """위경도 격자 인덱스 - 격자 칸(cell_degrees 단위)별 장소 id 집합, 조회는 반경에 걸친 칸만 확인"""
+
+    def __init__(self, cell_degrees: float = 0.05):
+        self.cell_degrees = cell_degrees
+        self._lock = threading.Lock()
+        self._points = {}  # id -> (위도, 경도, 이름, 분류)
+        self._cells = {}   # (위도 칸, 경도 칸) -> {id}
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell(self, lat, lng):
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lng / self.cell_degrees))
+
+    def _remove(self, place_id):
+        point = self._points.pop(place_id, None)
+        if point is not None:
+            cell = self._cells.get(self._cell(point[0], point[1]))
+            if cell is not None:
+                cell.discard(place_id)
+
+    def add_places(self, places):
+        """장소 추가/갱신 (좌표 없는 장소는 인덱스에서 빠짐) - PlaceStore listener로 등록"""
+        with self._lock:
+            for place in places:
+                place_id = make_safe_id(place["name"])
+                self._remove(place_id)
+                coordinates = place_coordinates(place)
+                if coordinates is None:
+                    continue
+                lat, lng = coordinates
+                self._points[place_id] = (lat, lng, place["name"], place.get("category", ""))
+                self._cells.setdefault(self._cell(lat, lng), set()).add(place_id)
+
+    def nearest(self, lat, lng, k: int = NEARBY_LIMIT, radius_km: float = NEARBY_RADIUS_KM, exclude=None):
+        """반경 radius_km 안에서 가까운 순으로 k개 - [{"name", "distance_km", "category"}]"""
+        lat_span = int(math.ceil(radius_km / KM_PER_DEGREE / self.cell_degrees))
+        # 경도 1도의 거리는 위도가 높을수록 짧아짐
+        lng_km = KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6)
+        lng_span = int(math.ceil(radius_km / lng_km / self.cell_degrees))
+        lat_cell, lng_cell = self._cell(lat, lng)
+
+        found = []
+        with self._lock:
+            for i in range(lat_cell - lat_span, lat_cell + lat_span + 1):
+                for j in range(lng_cell - lng_span, lng_cell + lng_span + 1):
+                    for place_id in self._cells.get((i, j), ()):
+                        if place_id == exclude:
+                            continue
+                        other_lat, other_lng, name, category = self._points[place_id]
+                        distance = haversine_km(lat, lng, other_lat, other_lng)
+                        if distance <= radius_km:
+                            found.append((distance, name, category))
+        found.sort()
+        return [
+            {"name": name, "distance_km": round(distance, 2), "category": category}
+            for distance, name, category in found[:k]
+        ]
+
+
+def _create_spatial_index():
+    store = get_place_store()
+    index = SpatialIndex()
+    index.add_places(store.all())
+    store.add_listener(index.add_places)
+    return index
+
+
+def get_spatial_index() -> SpatialIndex:
+    """장소 저장소 전체의 공간 인덱스 (프로세스당 한 번 생성, 이후 저장소 변경을 따라감)"""
+    return get_resource("spatial_index", _create_spatial_index)
+
+
+def find_nearby(place, k: int = NEARBY_LIMIT, radius_km: float = NEARBY_RADIUS_KM):
+    """장소 주변의 다른 장소 목록 (좌표가 없으면 빈 목록)"""
+    coordinates = place_coordinates(place)
+    if coordinates is None:
+        return []
+    return get_spatial_index().nearest(*coordinates, k=k, radius_km=radius_km, exclude=make_safe_id(place["name"]))
+
+
+def format_nearby(nearby) -> str:
+    """RAG 참고 정보에 붙일 주변 장소 한 줄 (없으면 빈 문자열)"""
+    if not nearby:
+        return ""
+    items = ", ".join(f"{item['name']}({item['distance_km']:.1f}km)" for item in nearby)
+    return f"주변 장소: {items}"
+
+
+def backfill(store=None) -> dict:
+    """좌표가 없는 장소는 Kakao에서 좌표/분류를 가져오고, 모든 장소의 nearby를 다시 계산해서 저장"""
+    from kakaoAPI import search_place
+
+    store = store or get_place_store()
+    report = {"located": 0, "missing": [], "updated": 0}
+    located = []
+    for place in store.all():
+        if place_coordinates(place) is None:
+            result = search_place(place["name"])
+            if result is None or place_coordinates(result) is None:
+                report["missing"].append(place["name"])
+                continue
+            place = {**place, "lat": result["lat"], "lng": result["lng"], "category": result.get("category", "")}
+            report["located"] += 1
+        located.append(place)
+
+    # 좌표를 먼저 인덱스에 반영해야 서로의 주변 장소로 잡힘
+    index = get_spatial_index()
+    index.add_places(located)
+    updated = [{**place, "nearby": find_nearby(place)} for place in located]
+    report["updated"] = len(store.upsert_many(updated))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="장소 좌표/주변 장소 채우기")
+    parser.add_argument("--backfill", action="store_true", help="좌표 없는 장소를 Kakao에서 채우고 nearby 다시 계산")
+    args = parser.parse_args()
+
+    if args.backfill:
+        report = backfill()
+        print(f"좌표 추가 {report['located']}개, 저장 갱신 {report['updated']}개")
+        if report["missing"]:
+            print(f"좌표를 찾지 못한 장소: {report['missing']}")
+    else:
+        index = get_spatial_index()
+        print(f"좌표가 있는 장소 {len(index)}개")
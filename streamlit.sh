@@ -5,5 +5,6 @@ pip install azure-search-documents
 pip install langchain-community
 pip install langchain-openai
 pip install langgraph
+pip install numpy
 python -m streamlit run streamlit_app.py --server.port 8000 --server.address 0.0.0.0
 
@@ -1,13 +1,24 @@
+import logging
+import os
+import queue
+import threading
+import time
+
 import streamlit as st
-from openai import AzureOpenAI
 from dotenv import load_dotenv
-from azure.search.documents import SearchClient
-from azure.core.credentials import AzureKeyCredential
-from utils import embed_text, upload_document_to_search, classify_input, chat_with_rag, make_safe_id, extract_place_name, search_rag, chat_with_gpt
-from kakaoAPI import search_place, save_to_json
-from agent_router import run_agent
+from agent_router import AGENT_MODE, stream_agent, get_graph, get_routed_graph
+from gazetteer import normalize_key
+from single_flight import SingleFlight
+from ttl_cache import TTLCache
+import api_client
+import tracing
 
 load_dotenv()
+
+# 세션 간 공유하는 결과 캐시 (정규화한 입력 → 렌더링에 필요한 결과)
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "3600"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "200"))
+
 # 페이지 설정
 st.set_page_config(
     page_title="TravelGenie Agent", 
@@ -91,81 +102,42 @@ with col1:
 with col2:
     generate_btn = st.button("🚀 여행 정보 생성", type="primary", use_container_width=True)
 
-def parse_agent_response(response: str):
-    """AI를 활용한 스마트 파싱으로 Agent 응답을 구조화"""
-    from utils import client
-    import os
-    
-    # AI 파싱 프롬프트
-    parsing_prompt = f"""
-다음 여행 정보를 3개 섹션으로 나누어 JSON 형식으로 정리해줘:
-
-1. summary: 핵심 요약 (2-3문장으로 간단하게)
-2. detailed_guide: 상세한 여행 가이드 (구체적인 정보, 팁, 추천사항)  
-3. additional_info: 일정, 주변정보, 예산, 교통 등 부가정보
-
-응답 형식:
-{{
-  "summary": "요약 내용...",
-  "detailed_guide": "상세 가이드 내용...",
-  "additional_info": "추가 정보 내용..."
-}}
-
-원본 텍스트:
-{response}
-"""
+def parse_agent_response(response: str, user_input: str, structured: dict = None):
+    """Agent 응답을 구조화 - 요약/상세/부가정보와 키워드, 여행팁, 예산을 한 번의 호출로 생성
 
+    structured: API 서버가 이미 구조화한 결과 (API 모드에서는 여기서 LLM을 호출하지 않음)
+    """
+    from utils import structure_response
+    
     try:
-        # AI로 파싱 수행
-        parsing_response = client.chat.completions.create(
-            model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"),
-            messages=[
-                {"role": "system", "content": "당신은 여행 정보를 체계적으로 정리하는 전문가입니다. JSON 형식으로만 응답하세요."},
-                {"role": "user", "content": parsing_prompt}
-            ],
-            temperature=0.3
-        )
-        
-        parsed_text = parsing_response.choices[0].message.content.strip()
-        
-        # JSON 파싱 시도
-        import json
-        import re
-        
-        # JSON 부분만 추출 (```json 태그 제거)
-        json_match = re.search(r'```json\s*(.*?)\s*```', parsed_text, re.DOTALL)
-        if json_match:
-            json_str = json_match.group(1)
+        if structured is not None:
+            result = dict(structured)
+        elif api_client.TRAVELGENIE_API_URL:
+            raise ValueError("API 서버가 응답을 구조화하지 못했습니다.")
         else:
-            # {} 로 둘러싸인 부분 찾기
-            json_match = re.search(r'\{.*\}', parsed_text, re.DOTALL)
-            json_str = json_match.group(0) if json_match else parsed_text
-        
-        parsed_data = json.loads(json_str)
-        
-        # 검증 및 기본값 설정
-        result = {
-            "summary": parsed_data.get("summary", "").strip(),
-            "detailed_guide": parsed_data.get("detailed_guide", "").strip(), 
-            "additional_info": parsed_data.get("additional_info", "").strip()
-        }
+            result = structure_response(user_input, response).model_dump()
         
         # 비어있는 섹션 처리
-        if not result["summary"]:
+        if not result["summary"].strip():
             result["summary"] = response[:200] + "..." if len(response) > 200 else response
             
-        if not result["detailed_guide"]:
+        if not result["detailed_guide"].strip():
             result["detailed_guide"] = response
             
         return result
         
     except Exception as e:
-        print(f"AI 파싱 실패, 기본 파싱 사용: {e}")
-        # AI 파싱 실패시 기본 파싱으로 폴백
+        # AI 파싱 실패 - 기본 파싱 사용
+        tracing.log_event("structure_failed", logging.WARNING, force=True, error=f"{type(e).__name__}: {e}")
+        # AI 파싱 실패시 기본 파싱으로 폴백 (예산은 추정값 대신 비워둠)
         return {
             "summary": response[:300] + "..." if len(response) > 300 else response,
             "detailed_guide": response,
-            "additional_info": "추가 정보를 준비 중입니다."
+            "additional_info": "추가 정보를 준비 중입니다.",
+            "keywords": [],
+            "preparation": [],
+            "useful_info": [],
+            "budget": None
         }
     
 # def parse_agent_response(response: str):
@@ -200,8 +172,8 @@ def parse_agent_response(response: str):
     
 #     return parsed
 
-def create_detailed_guide(detailed_text, user_input):
-    """상세 가이드 탭 내용 생성 - AI로 여행팁과 체크리스트 동적 생성"""
+def create_detailed_guide(detailed_text, preparation, useful_info):
+    """상세 가이드 탭 내용 생성 - 구조화 응답의 여행팁과 체크리스트 표시"""
     st.markdown("### 📖 상세 여행 가이드")
     
     if detailed_text.strip():
@@ -210,158 +182,50 @@ def create_detailed_guide(detailed_text, user_input):
         st.markdown("상세한 여행 정보를 제공합니다.")
         st.markdown(detailed_text or "추가 정보가 준비 중입니다.")
     
-    # AI로 맞춤형 여행팁 생성
+    # 맞춤형 여행팁
     st.markdown("---")
     st.markdown("### 💡 맞춤 여행 팁")
     
-    try:
-        from utils import client
-        import os
-        
-        # 여행팁 생성 프롬프트
-        tips_prompt = f"""
-다음 여행 정보를 바탕으로 실용적인 여행 팁을 생성해주세요:
-
-사용자 요청: {user_input}
-상세 정보: {detailed_text}
-
-다음 형식으로 응답해주세요:
-PREPARATION: 준비사항 3-4개 (체크리스트 형태)
-USEFUL_INFO: 유용한 정보 3-4개 (팁 형태)
-
-예시 형식:
-PREPARATION:
-- 여권 유효기간 6개월 이상 확인
-- 현지 날씨에 맞는 의복 준비
-- 필수 약품 및 상비약 챙기기
-
-USEFUL_INFO:
-- 현지 교통카드 미리 구매하기
-- 구글 번역기 앱 다운로드
-- 현지 화폐 소액 준비
-"""
-
-        tips_response = client.chat.completions.create(
-            model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"),
-            messages=[
-                {"role": "system", "content": "여행 전문가로서 실용적이고 구체적인 팁을 제공하세요."},
-                {"role": "user", "content": tips_prompt}
-            ],
-            temperature=0.4
-        )
-        
-        tips_content = tips_response.choices[0].message.content.strip()
-        
-        # 응답 파싱
-        preparation_section = ""
-        useful_info_section = ""
-        
-        if "PREPARATION:" in tips_content:
-            sections = tips_content.split("USEFUL_INFO:")
-            preparation_section = sections[0].replace("PREPARATION:", "").strip()
-            if len(sections) > 1:
-                useful_info_section = sections[1].strip()
-        
-        # 준비사항 표시
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("**🎒 준비사항 체크리스트:**")
-            if preparation_section:
-                st.markdown(preparation_section)
-            else:
-                st.markdown("- 여행 일정 재확인\n- 필수 서류 준비\n- 짐 패킹 체크")
-        
-        with col2:
-            st.markdown("**💎 유용한 정보:**")
-            if useful_info_section:
-                st.markdown(useful_info_section)
-            else:
-                st.markdown("- 현지 정보 미리 조사\n- 비상연락처 준비\n- 여행보험 가입")
-                
-    except Exception as e:
-        # 기본 팁 표시
-        col1, col2 = st.columns(2)
-        with col1:
-            st.markdown("""
-            **🎒 준비사항 체크리스트:**
-            - 여권/신분증 확인
-            - 숙박 예약 확인
-            - 교통편 예약
-            - 여행 보험 가입
-            """)
-        
-        with col2:
-            st.markdown("""
-            **💎 유용한 정보:**
-            - 📱 현지 앱 다운로드
-            - 💳 결제수단 준비
-            - 🗺️ 오프라인 지도 다운
-            - 📞 비상연락처 메모
-            """)
+    # 준비사항 표시
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**🎒 준비사항 체크리스트:**")
+        if preparation:
+            st.markdown("\n".join(f"- {item}" for item in preparation))
+        else:
+            st.markdown("- 여행 일정 재확인\n- 필수 서류 준비\n- 짐 패킹 체크")
+    
+    with col2:
+        st.markdown("**💎 유용한 정보:**")
+        if useful_info:
+            st.markdown("\n".join(f"- {item}" for item in useful_info))
+        else:
+            st.markdown("- 현지 정보 미리 조사\n- 비상연락처 준비\n- 여행보험 가입")
 
-def create_schedule_info(additional_text, user_input):
+def create_schedule_info(additional_text, budget):
     """일정/주변 정보 탭 내용 생성"""
     st.markdown("### 🗓️ 추천 일정 & 주변 정보")
     
     if additional_text.strip():
         st.markdown(additional_text)
     
-    # AI로 예산 정보 추출 및 생성
-    try:
-        from utils import client
-        import os
-        
-        budget_prompt = f"""
-다음 여행 정보를 바탕으로 예상 예산을 분석해주세요:
-- 숙박비 (1박 기준)
-- 식비 (1일 기준) 
-- 교통비 (�왕복 기준)
-
-숫자만 원화 단위로 응답하세요. 형식: 숙박비,식비,교통비
-예: 120000,60000,40000
-
-원본 정보: {additional_text}
-사용자 입력: {user_input}
-"""
-
-        budget_response = client.chat.completions.create(
-            model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"),
-            messages=[
-                {"role": "system", "content": "여행 예산을 분석하는 전문가입니다. 숫자만 간단히 응답하세요."},
-                {"role": "user", "content": budget_prompt}
-            ],
-            temperature=0.3
-        )
-        
-        budget_str = budget_response.choices[0].message.content.strip()
-        budget_parts = budget_str.split(',')
-        
-        if len(budget_parts) >= 3:
-            accommodation = f"{int(budget_parts[0]):,}원"
-            food = f"{int(budget_parts[1]):,}원" 
-            transport = f"{int(budget_parts[2]):,}원"
-        else:
-            raise Exception("예산 파싱 실패")
-            
-    except Exception as e:
-        # 기본값 사용
-        accommodation = "150,000원"
-        food = "80,000원"
-        transport = "50,000원"
-    
     # 예산 정보 표시
     st.markdown("---")
     st.markdown("### 💰 예상 예산")
     
+    if not budget:
+        st.info("예산 정보를 분석하지 못했습니다. 잠시 후 다시 시도해보세요.")
+        return
+    
     budget_col1, budget_col2, budget_col3 = st.columns(3)
     with budget_col1:
-        st.metric("숙박비", accommodation, "1박 기준")
+        st.metric("숙박비", f"{budget['accommodation']:,}원", "1박 기준")
     with budget_col2:
-        st.metric("식비", food, "1일 기준")
+        st.metric("식비", f"{budget['food']:,}원", "1일 기준")
     with budget_col3:
-        st.metric("교통비", transport, "왕복 기준")
+        st.metric("교통비", f"{budget['transport']:,}원", "왕복 기준")
 
-def create_summary_content(summary_text):
+def create_summary_content(summary_text, keywords):
     """요약 탭 내용 생성"""
     st.markdown("### 📋 여행 정보 요약")
     
@@ -372,38 +236,14 @@ def create_summary_content(summary_text):
     </div>
     """, unsafe_allow_html=True)
     
-    # AI로 키워드 추출
-    try:
-        from utils import client
-        import os
-        
-        keyword_prompt = f"""
-다음 여행 정보에서 핵심 키워드 5개를 추출해주세요. 
-키워드는 쉼표로 구분해서 나열하세요. (예: 관광지, 맛집, 호텔, 교통, 예산)
-
-텍스트: {summary_text}
-"""
-        
-        keyword_response = client.chat.completions.create(
-            model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"),
-            messages=[
-                {"role": "system", "content": "여행 정보에서 핵심 키워드만 간단히 추출하세요."},
-                {"role": "user", "content": keyword_prompt}
-            ],
-            temperature=0.3
-        )
-        
-        keywords_str = keyword_response.choices[0].message.content.strip()
-        keywords = [kw.strip() for kw in keywords_str.split(',') if kw.strip()]
-        
-        if keywords:
-            st.markdown("### 🏷️ 핵심 키워드")
-            cols = st.columns(min(len(keywords), 5))
-            for i, keyword in enumerate(keywords[:5]):
-                with cols[i]:
-                    st.button(f"#{keyword}", disabled=True)
-    except Exception as e:
-        # 키워드 추출 실패시 기본 키워드 사용
+    if keywords:
+        st.markdown("### 🏷️ 핵심 키워드")
+        cols = st.columns(min(len(keywords), 5))
+        for i, keyword in enumerate(keywords[:5]):
+            with cols[i]:
+                st.button(f"#{keyword}", disabled=True)
+    else:
+        # 키워드가 없으면 기본 키워드 사용
         default_keywords = ["여행", "관광", "정보"]
         st.markdown("### 🏷️ 관련 키워드") 
         cols = st.columns(len(default_keywords))
@@ -411,6 +251,19 @@ def create_summary_content(summary_text):
             with cols[i]:
                 st.button(f"#{keyword}", disabled=True)
 
+def render_tabs(parsed_result):
+    """구조화된 결과로 탭 표시 (추가 LLM 호출 없음)"""
+    tab1, tab2, tab3 = st.tabs(["📋 요약", "📖 상세 가이드", "🗓️ 일정 & 주변정보"])
+    
+    with tab1:
+        create_summary_content(parsed_result["summary"], parsed_result["keywords"])
+    
+    with tab2:
+        create_detailed_guide(parsed_result["detailed_guide"], parsed_result["preparation"], parsed_result["useful_info"])
+    
+    with tab3:
+        create_schedule_info(parsed_result["additional_info"], parsed_result["budget"])
+
 
 
 # if st.button("여행 정보 생성"):
@@ -425,63 +278,202 @@ def create_summary_content(summary_text):
 #     else:
 #         st.warning("입력값을 먼저 작성해주세요.")
 
-if generate_btn:
-    if user_input:
-        with st.spinner("🤖 AI Agent가 정보를 분석 중입니다..."):
-            try:
-                # Agent 실행
-                result = run_agent(user_input)
-                
-                # 성공 메시지
-                st.markdown("""
-                <div class="success-box">
-                    <strong>✅ 분석 완료!</strong> AI Agent가 맞춤형 여행 정보를 생성했습니다.
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # 응답 파싱
-                parsed_result = parse_agent_response(result)
-                
-                # print("=" * 50)
-                # print(parsed_result)  # 디버깅용
-                # print("=" * 50)
-                
-                # 탭 생성
-                tab1, tab2, tab3 = st.tabs(["📋 요약", "📖 상세 가이드", "🗓️ 일정 & 주변정보"])
-                
-                with tab1:
-                    create_summary_content(parsed_result["summary"])
-                
-                with tab2:
-                    create_detailed_guide(parsed_result["detailed_guide"], user_input)
-                
-                with tab3:
-                    create_schedule_info(parsed_result["additional_info"], user_input)
-                
-                # 원본 응답 (디버깅용, 접을 수 있게)
-                with st.expander("🔧 원본 Agent 응답 (디버깅용)"):
-                    st.text(result)
-                
-            except Exception as e:
-                st.markdown(f"""
-                <div class="warning-box">
-                    <strong>❌ 에러 발생:</strong> {str(e)}
-                </div>
-                """, unsafe_allow_html=True)
-                
-                # 에러 해결 팁
-                st.markdown("### 🔧 문제 해결 방법")
-                st.markdown("""
-                1. 입력을 더 구체적으로 작성해보세요
-                2. 네트워크 연결을 확인해보세요
-                3. 잠시 후 다시 시도해보세요
-                """)
+@st.cache_resource(show_spinner="🔧 AI Agent를 준비하는 중입니다...")
+def warm_up_resources():
+    """클라이언트와 컴파일된 그래프를 프로세스당 한 번 만들어 모든 세션/rerun에서 공유"""
+    import utils
+    utils.get_openai_client()
+    utils.get_search_client()
+    utils.get_embedding_cache()
+    get_graph()
+    get_routed_graph()
+    return True
+
+@st.cache_resource
+def get_result_cache():
+    """모든 세션이 공유하는 결과 캐시 - 같은 질문은 다른 사용자도 API 호출 없이 바로 표시"""
+    return TTLCache(maxsize=RESULT_CACHE_MAX_ENTRIES, ttl=RESULT_CACHE_TTL)
+
+@st.cache_resource
+def get_result_flight():
+    """같은 질문을 동시에 생성하는 세션들을 하나로 합침 - 먼저 온 세션만 Agent를 실행"""
+    return SingleFlight("streamlit")
+
+# 도구 이름 → 진행 상황 표시용 라벨
+TOOL_LABELS = {
+    "SearchTourGuide": "관광지 정보 검색",
+    "RecommendTripPlan": "여행 일정 추천",
+}
+
+def agent_events(user_input):
+    """stream_agent 이벤트 - TRAVELGENIE_API_URL이 있으면 API 서버 스트림 (구조화 결과와 단계별 시간도 함께 받음)"""
+    if api_client.TRAVELGENIE_API_URL:
+        return api_client.stream_agent(user_input, structured=True)
+    return stream_agent(user_input)
+
+def result_cache_key(user_input: str):
+    """입력 정규화 키 - 공백/대소문자만 다른 질문은 같은 결과를 공유 (Agent 모드별로 구분)"""
+    return (AGENT_MODE, normalize_key(user_input))
+
+def request_regenerate():
+    # 버튼 콜백은 rerun 전에 실행되므로, 다음 실행에서 캐시를 건너뛰도록 표시만 해둠
+    st.session_state["regenerate"] = True
+
+def compute_result(user_input: str, on_event=None):
+    """Agent 실행 + 응답 구조화 - 화면을 다시 그리는 데 필요한 결과를 dict로 반환
+
+    화면에 아무것도 그리지 않으므로 여러 세션이 결과를 공유할 수 있다 (on_event: 진행 이벤트를 받을 콜백)
+    """
+    # 요청 하나를 span 트리로 기록 (Agent 실행 + 응답 구조화)
+    with tracing.trace("streamlit.request") as request_trace:
+        final = {}
+        for event in agent_events(user_input):
+            if event["type"] == "done":
+                final["output"] = event["output"]
+            elif event["type"] == "parsed":
+                final["parsed"] = event["result"]
+            elif event["type"] == "trace":
+                final["trace"] = event
+            if on_event is not None:
+                on_event(event)
+        result = final.get("output") or "응답을 생성할 수 없습니다."
+        
+        # 응답 파싱 (스트림 완료 후 탭 채우기)
+        parsed_result = parse_agent_response(result, user_input, final.get("parsed"))
+    
+    # API 모드면 단계별 시간은 서버가 기록한 span 트리 기준
+    server_trace = final.get("trace")
+    return {
+        "input": user_input,
+        "output": result,
+        "parsed": parsed_result,
+        "duration_ms": request_trace.duration * 1000,
+        "trace_id": server_trace["trace_id"] if server_trace else request_trace.trace_id,
+        "stages": server_trace["stages"] if server_trace else tracing.stage_summary(request_trace),
+        "created_at": time.time()
+    }
+
+def generate_result(user_input: str):
+    """이 세션에서 결과 생성 - 같은 질문을 다른 세션이 생성 중이면 합류하고, 화면은 각 세션이 직접 그림
+
+    직접 생성할 때는 계산을 별도 스레드에서 돌리고 이 스레드는 진행 이벤트만 그린다.
+    그래서 이 세션이 중간에 rerun/stop 되어도 계산은 끝까지 진행되고, 합류한 세션들은 결과를 받는다.
+    """
+    flight = get_result_flight()
+    cache_key = result_cache_key(user_input)
+    if flight.in_flight(cache_key):
+        # 다른 세션이 같은 질문을 생성 중이면 그 결과를 기다림
+        with st.spinner("⏳ 같은 질문을 처리하는 중입니다. 잠시만 기다려주세요..."):
+            return flight.do(cache_key, lambda: compute_result(user_input))
+
+    events = queue.Queue()
+    outcome = {}
+
+    def run():
+        try:
+            outcome["entry"] = flight.do(cache_key, lambda: compute_result(user_input, events.put))
+        except Exception as e:
+            outcome["error"] = e
+        finally:
+            events.put(None)
+
+    threading.Thread(target=run, name="streamlit-generate", daemon=True).start()
+
+    # Agent 실행 - 도구 진행 상황과 답변 토큰을 도착하는 대로 표시
+    with st.status("🤖 AI Agent가 정보를 분석 중입니다...") as status:
+        answer = st.empty()
+        tokens = []
+        while (event := events.get()) is not None:
+            if event["type"] == "tool_start":
+                # 도구 호출 전에 나온 토큰은 최종 답변에서 빠지므로 화면에서도 지움
+                tokens.clear()
+                answer.empty()
+                status.write(f"🔧 {TOOL_LABELS.get(event['tool'], event['tool'])} 중...")
+            elif event["type"] == "tool_end":
+                status.write(f"✅ {TOOL_LABELS.get(event['tool'], event['tool'])} 완료")
+            elif event["type"] == "token":
+                tokens.append(event["content"])
+                answer.markdown("".join(tokens))
+            elif event["type"] == "done":
+                status.update(label="📋 여행 정보를 정리하는 중입니다...")
+        if "error" in outcome:
+            status.update(label="❌ 분석 실패", state="error", expanded=False)
+            raise outcome["error"]
+        status.update(label="✅ 분석 완료", state="complete", expanded=False)
+    return outcome["entry"]
+
+def render_result(entry: dict, cached: bool = False):
+    """저장된 결과로 화면 그리기 - rerun/캐시 적중 시에는 API 호출 없이 이것만 실행"""
+    # 성공 메시지
+    if cached:
+        created = time.strftime("%H:%M", time.localtime(entry["created_at"]))
+        message = f"'{entry['input']}'에 대해 {created}에 생성한 결과를 보여드립니다."
+    else:
+        message = "AI Agent가 맞춤형 여행 정보를 생성했습니다."
+    st.markdown(f"""
+    <div class="success-box">
+        <strong>✅ 분석 완료!</strong> {message}
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # 탭 생성
+    render_tabs(entry["parsed"])
+    
+    # 캐시를 건너뛰고 같은 입력으로 새로 생성
+    st.button("🔄 다시 생성", on_click=request_regenerate)
+    
+    # 원본 응답 (디버깅용, 접을 수 있게)
+    with st.expander("🔧 원본 Agent 응답 (디버깅용)"):
+        st.text(entry["output"])
+        st.markdown(f"**단계별 소요 시간** - 전체 {entry['duration_ms']:.0f} ms (trace `{entry['trace_id']}`)")
+        st.dataframe(entry["stages"], use_container_width=True, hide_index=True)
+
+# 다시 생성 요청이면 화면에 보이던 결과의 입력으로, 캐시를 건너뛰고 생성
+regenerate = st.session_state.pop("regenerate", False)
+last_result = st.session_state.get("last_result")
+if regenerate and last_result:
+    request_input = last_result["input"]
+else:
+    request_input = user_input if generate_btn else None
+
+if generate_btn and not user_input and not regenerate:
+    st.markdown("""
+    <div class="warning-box">
+        <strong>⚠️ 알림:</strong> 여행지나 조건을 먼저 입력해주세요.
+    </div>
+    """, unsafe_allow_html=True)
+elif request_input:
+    cache_key = result_cache_key(request_input)
+    entry = None if regenerate else get_result_cache().get(cache_key)
+    if entry is not None:
+        st.session_state["last_result"] = entry
+        render_result(entry, cached=True)
     else:
-        st.markdown("""
-        <div class="warning-box">
-            <strong>⚠️ 알림:</strong> 여행지나 조건을 먼저 입력해주세요.
-        </div>
-        """, unsafe_allow_html=True)
+        try:
+            entry = generate_result(request_input)
+            st.session_state["last_result"] = entry
+            # 구조화에 실패한 임시 결과는 다른 세션과 공유하지 않음
+            if entry["parsed"]["budget"] is not None:
+                get_result_cache().set(cache_key, entry)
+            render_result(entry)
+            
+        except Exception as e:
+            st.markdown(f"""
+            <div class="warning-box">
+                <strong>❌ 에러 발생:</strong> {str(e)}
+            </div>
+            """, unsafe_allow_html=True)
+            
+            # 에러 해결 팁
+            st.markdown("### 🔧 문제 해결 방법")
+            st.markdown("""
+            1. 입력을 더 구체적으로 작성해보세요
+            2. 네트워크 연결을 확인해보세요
+            3. 잠시 후 다시 시도해보세요
+            """)
+elif last_result:
+    # 버튼을 누르지 않은 rerun(입력 수정, 위젯 조작 등)은 세션에 있는 결과를 그대로 다시 그림
+    render_result(last_result, cached=True)
 
 # 푸터
 st.markdown("---")
@@ -494,6 +486,10 @@ with col2:
     </div>
     """, unsafe_allow_html=True)
 
+# 화면을 먼저 그린 뒤 첫 실행에서만 리소스 준비 (이후 rerun/세션은 캐시 사용, API 모드는 서버가 준비)
+if not api_client.TRAVELGENIE_API_URL:
+    warm_up_resources()
+
 # st.set_page_config(page_title="TravelGenie", page_icon="🌍")
 # st.title("🌍 TravelGenie - AI 여행 가이드")
 
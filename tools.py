@@ -1,37 +1,267 @@
 # agents/tools.py
-from langchain.agents import Tool
-from utils import search_rag, chat_with_rag, chat_with_gpt, extract_place_name, embed_text, upload_document_to_search, make_safe_id
-from kakaoAPI import search_place, save_to_json
+from utils import search_rag, chat_with_rag, chat_with_gpt, extract_place_name, embed_text, add_document_listener, place_context
+from utils import asearch_rag, achat_with_rag, achat_with_gpt, aextract_place_name, aembed_text
+from utils import chat_with_itinerary, achat_with_itinerary
+from kakaoAPI import search_place, asearch_place, KakaoAPIError
+from indexing_queue import indexing_queue
+from resources import get_resource
+from semantic_cache import SemanticCache
+from ttl_cache import TTLCache
+from gazetteer import normalize_key
+from place_store import add_store_listener, make_safe_id
+from route_planner import plan_for_request, format_itinerary, trip_scope, itinerary_place_ids
+from single_flight import SingleFlight
+import tracing
+import asyncio
+import logging
+import os
+import time
 
+# 비동기 경로에서 RAG 검색이 KAKAO_PREFETCH_DELAY초 안에 끝나지 않으면 Kakao 검색을 미리 시작할지
+# (RAG에 있으면 Kakao 요청은 취소) - 적중해도 할당량을 쓰는 경우가 있어서 기본값은 끔
+KAKAO_PREFETCH = os.getenv("KAKAO_PREFETCH", "0") == "1"
+KAKAO_PREFETCH_DELAY = float(os.getenv("KAKAO_PREFETCH_DELAY", "0.2"))
+
+# 비슷한 질문에 대한 답변 재사용 캐시
+semantic_cache = SemanticCache(
+    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.97")),
+    ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "21600")),
+    max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+)
+
+# 장소 문서가 추가/변경/삭제되면 그 문서를 참고한 답변(관광지 정보, 여행 일정)만 무효화
+add_document_listener(lambda doc: semantic_cache.invalidate(source=doc["id"]))
+
+# 찾을 수 없었던 장소 캐시 - ("input", 정규화 입력) / ("place", 정규화 장소명) 키
+negative_cache = TTLCache(
+    maxsize=int(os.getenv("NEGATIVE_CACHE_MAX_ENTRIES", "10000")),
+    ttl=float(os.getenv("NEGATIVE_CACHE_TTL", "1800"))
+)
+
+def evict_negative_cache(places):
+    """새로 저장된 장소와 관련된 '찾을 수 없음' 항목 삭제"""
+    for place in places:
+        name_key = normalize_key(place["name"])
+        negative_cache.discard_if(
+            lambda key: name_key in key[1] or (key[0] == "place" and key[1] in name_key)
+        )
+
+# 장소 저장소는 처음 쓸 때 열리므로 import 시점에는 등록만 해둠
+add_store_listener(evict_negative_cache)
+
+def not_found_message(place_name: str) -> str:
+    return f"'{place_name}'에 대한 정보를 찾을 수 없습니다."
+
+KAKAO_ERROR_MESSAGE = "지금은 장소 정보를 가져올 수 없습니다. 잠시 후 다시 시도해주세요."
+
+def find_known_miss(kind: str, text: str):
+    """부정 캐시 조회 - 찾을 수 없다고 기록된 장소명 (없으면 None)"""
+    place_name = negative_cache.get((kind, normalize_key(text)))
+    tracing.record_cache("negative", place_name is not None)
+    return place_name
+
+def remember_not_found(input_text: str, place_name: str):
+    negative_cache.set(("input", normalize_key(input_text)), place_name)
+    negative_cache.set(("place", normalize_key(place_name)), place_name)
+
+# 같은 장소(make_safe_id 기준)의 Kakao 검색 + 색인 등록은 동시에 한 번만
+place_flight = SingleFlight("place")
+
+def fetch_new_place(place_name: str):
+    """RAG에 없는 장소를 Kakao에서 가져와 색인 큐에 등록 - 검색 결과 반환 (없으면 None)"""
+    def fetch():
+        result = search_place(place_name)
+        if result:
+            indexing_queue.put(result)
+        return result
+    return place_flight.do(make_safe_id(place_name), fetch)
+
+async def afetch_new_place(place_name: str, prefetch=None):
+    """fetch_new_place()의 비동기 버전 - prefetch: 미리 시작한 asearch_place Task (이 함수가 맡아서 정리)
+
+    이 호출이 가져오기를 시작하면 prefetch는 공유 Task가 끝까지 사용하므로 호출자가 취소되어도 건드리지 않고,
+    이미 진행 중인 가져오기에 합류했으면 쓰지 않으므로 취소한다.
+    """
+    started = []
+
+    async def fetch(kakao):
+        result = await kakao
+        if result:
+            indexing_queue.put(result)
+        return result
+
+    def start():
+        started.append(True)
+        return fetch(prefetch or asearch_place(place_name))
+
+    try:
+        return await place_flight.ado(make_safe_id(place_name), start)
+    finally:
+        if prefetch is not None and not started:
+            prefetch.cancel()
+
+async def delayed_search_place(place_name: str, delay: float):
+    """delay초 뒤에 Kakao 검색 - 그 전에 취소되면(RAG 적중) 요청을 보내지 않음"""
+    await asyncio.sleep(delay)
+    return await asearch_place(place_name)
+
+@tracing.traced("tool.search_tour_guide")
 def search_tour_guide(input_text: str) -> str:
+    # 이미 찾을 수 없다고 확인된 질문/장소는 바로 반환
+    known_miss = find_known_miss("input", input_text)
+    if known_miss is not None:
+        tracing.annotate(path="negative_cache")
+        return not_found_message(known_miss)
+
+    # 장소를 먼저 정해서 답변 캐시는 같은 장소 안에서만 찾음 (알려진 장소는 gazetteer로 로컬에서 바로 찾음)
+    start = time.perf_counter()
     place_name = extract_place_name(input_text)
-    context = search_rag(place_name)
+    if find_known_miss("place", place_name) is not None:
+        tracing.annotate(path="negative_cache")
+        return not_found_message(place_name)
+
+    query_vector = embed_text(input_text)
+    cached = semantic_cache.lookup("search_tour_guide", query_vector, scope=make_safe_id(place_name))
+    if cached is not None:
+        tracing.annotate(path="semantic_cache")
+        return cached
+    context, sources = search_rag(place_name, with_sources=True)
 
     if not context.strip():
-        result = search_place(place_name)    
+        tracing.annotate(path="kakao")
+        try:
+            result = fetch_new_place(place_name)
+        except KakaoAPIError as e:
+            tracing.log_event("kakao_error", logging.WARNING, force=True, place=place_name, error=str(e))
+            return KAKAO_ERROR_MESSAGE
         if result:
-            save_to_json(result)
-            embed = embed_text(result["name"])
-            result["id"] = make_safe_id(result["name"])
-            result["contentVector"] = embed
-            upload_document_to_search(result)
-            return f"새로운 장소 정보를 추가했어요! 다시 실행해보세요."
+            # 저장/임베딩/업로드는 백그라운드 큐에 맡기고, 방금 가져온 정보로 바로 답변
+            return chat_with_rag(input_text, place_context(result))
         else:
-            return f"'{place_name}'에 대한 정보를 찾을 수 없습니다."
-    return chat_with_rag(input_text, context)
+            remember_not_found(input_text, place_name)
+            return not_found_message(place_name)
+    tracing.annotate(path="rag")
+    answer = chat_with_rag(input_text, context)
+    semantic_cache.store("search_tour_guide", query_vector, answer, time.perf_counter() - start, sources,
+                         scope=make_safe_id(place_name))
+    return answer
+
+@tracing.traced("tool.search_tour_guide")
+async def asearch_tour_guide(input_text: str) -> str:
+    """search_tour_guide()의 비동기 버전 - KAKAO_PREFETCH=1이면 느린 RAG 검색과 Kakao 검색을 겹쳐서 미스 경로 지연을 줄임"""
+    known_miss = find_known_miss("input", input_text)
+    if known_miss is not None:
+        tracing.annotate(path="negative_cache")
+        return not_found_message(known_miss)
+
+    start = time.perf_counter()
+    place_name = await aextract_place_name(input_text)
+    if find_known_miss("place", place_name) is not None:
+        tracing.annotate(path="negative_cache")
+        return not_found_message(place_name)
+
+    query_vector = await aembed_text(input_text)
+    cached = semantic_cache.lookup("search_tour_guide", query_vector, scope=make_safe_id(place_name))
+    if cached is not None:
+        tracing.annotate(path="semantic_cache")
+        return cached
+
+    kakao_task = asyncio.create_task(delayed_search_place(place_name, KAKAO_PREFETCH_DELAY)) if KAKAO_PREFETCH else None
+    try:
+        context, sources = await asearch_rag(place_name, with_sources=True)
+    except BaseException:
+        if kakao_task:
+            kakao_task.cancel()
+        raise
+
+    if context.strip():
+        tracing.annotate(path="rag")
+        if kakao_task:
+            kakao_task.cancel()
+        answer = await achat_with_rag(input_text, context)
+        semantic_cache.store("search_tour_guide", query_vector, answer, time.perf_counter() - start, sources,
+                             scope=make_safe_id(place_name))
+        return answer
 
+    tracing.annotate(path="kakao")
+    try:
+        result = await afetch_new_place(place_name, kakao_task)
+    except KakaoAPIError as e:
+        tracing.log_event("kakao_error", logging.WARNING, force=True, place=place_name, error=str(e))
+        return KAKAO_ERROR_MESSAGE
+    if not result:
+        remember_not_found(input_text, place_name)
+        return not_found_message(place_name)
+    return await achat_with_rag(input_text, place_context(result))
+
+@tracing.traced("tool.recommend_trip_plan")
 def recommend_trip_plan(input_text: str) -> str:
-    return chat_with_gpt(input_text)
-
-tools = [
-    Tool(
-        name="SearchTourGuide",
-        func=search_tour_guide,
-        description="특정 관광지에 대한 정보를 제공해주는 도구입니다."
-    ),
-    Tool(
-        name="RecommendTripPlan",
-        func=recommend_trip_plan,
-        description="조건 기반으로 여행지를 추천하고 일정을 안내해주는 도구입니다."
-    )
-]
\ No newline at end of file
+    # 지역과 일수가 같은 질문끼리만 답변 재사용 ('3일 부산'과 '4일 부산'은 다른 답변)
+    scope = trip_scope(input_text)
+    query_vector = embed_text(input_text)
+    cached = semantic_cache.lookup("recommend_trip_plan", query_vector, scope=scope)
+    if cached is not None:
+        return cached
+
+    start = time.perf_counter()
+    # 저장소에 좌표가 있는 지역 장소가 있으면 동선은 route_planner가 정하고 LLM은 설명만 함
+    itinerary = plan_for_request(input_text)
+    if itinerary:
+        tracing.annotate(path="itinerary", stops=itinerary["stops"], days=len(itinerary["days"]))
+        answer = chat_with_itinerary(input_text, format_itinerary(itinerary))
+    else:
+        tracing.annotate(path="gpt")
+        answer = chat_with_gpt(input_text)
+    semantic_cache.store("recommend_trip_plan", query_vector, answer, time.perf_counter() - start,
+                         itinerary_place_ids(itinerary) if itinerary else (), scope=scope)
+    return answer
+
+@tracing.traced("tool.recommend_trip_plan")
+async def arecommend_trip_plan(input_text: str) -> str:
+    # 동선 계산은 장소 저장소(파일 잠금)를 읽으므로 이벤트 루프 밖에서
+    scope = await asyncio.to_thread(trip_scope, input_text)
+    query_vector = await aembed_text(input_text)
+    cached = semantic_cache.lookup("recommend_trip_plan", query_vector, scope=scope)
+    if cached is not None:
+        return cached
+
+    start = time.perf_counter()
+    itinerary = await asyncio.to_thread(plan_for_request, input_text)
+    if itinerary:
+        tracing.annotate(path="itinerary", stops=itinerary["stops"], days=len(itinerary["days"]))
+        answer = await achat_with_itinerary(input_text, format_itinerary(itinerary))
+    else:
+        tracing.annotate(path="gpt")
+        answer = await achat_with_gpt(input_text)
+    semantic_cache.store("recommend_trip_plan", query_vector, answer, time.perf_counter() - start,
+                         itinerary_place_ids(itinerary) if itinerary else (), scope=scope)
+    return answer
+
+def _create_tools():
+    # langchain.agents.Tool과 같은 클래스 - import 비용이 커서 Agent를 만들 때 import
+    from langchain_core.tools import Tool
+
+    return [
+        Tool(
+            name="SearchTourGuide",
+            func=search_tour_guide,
+            coroutine=asearch_tour_guide,
+            description="특정 관광지에 대한 정보를 제공해주는 도구입니다."
+        ),
+        Tool(
+            name="RecommendTripPlan",
+            func=recommend_trip_plan,
+            coroutine=arecommend_trip_plan,
+            description="조건 기반으로 여행지를 추천하고 일정을 안내해주는 도구입니다."
+        )
+    ]
+
+def get_tools():
+    """ReAct Agent에 등록할 도구 목록"""
+    return get_resource("agent_tools", _create_tools)
+
+def __getattr__(name):
+    """기존 `tools.tools` 접근 호환"""
+    if name == "tools":
+        return get_tools()
+    raise AttributeError(f"module 'tools' has no attribute '{name}'")
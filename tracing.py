@@ -0,0 +1,406 @@
+# tracing.py
+"""요청별 span 트리와 지연 시간/토큰/캐시 지표
+
+    with tracing.trace("streamlit.request", mode="react") as root:  # 요청 하나 = span 트리 하나
+        with tracing.span("llm.rag") as s:                            # 현재 span의 자식
+            response = client.chat.completions.create(...)
+            s.record_usage(response.usage)
+
+- 모든 span은 끝날 때 Prometheus 히스토그램(travelgenie_span_duration_seconds)에 기록
+  (요청 밖, 예를 들어 백그라운드 색인 큐에서 만든 span은 트리 없이 지표만 남김)
+- TRACE_FILE을 지정하면 끝난 요청의 span 트리를 JSON 한 줄씩 추가
+- PROMETHEUS_TEXTFILE을 지정하면 요청이 끝날 때마다 지표를 텍스트 형식으로 저장 (node_exporter textfile collector용)
+- 구조화 로그(JSON)는 TRACE_LOG_SAMPLE_RATE 비율의 요청만 남김 (오류/느린 요청은 항상)
+"""
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TRACE_FILE = os.getenv("TRACE_FILE")
+PROMETHEUS_TEXTFILE = os.getenv("PROMETHEUS_TEXTFILE")
+TRACE_LOG_SAMPLE_RATE = float(os.getenv("TRACE_LOG_SAMPLE_RATE", "0.1"))
+TRACE_SLOW_SECONDS = float(os.getenv("TRACE_SLOW_SECONDS", "10"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+logger = logging.getLogger("travelgenie")
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(os.getenv("TRACE_LOG_LEVEL", "INFO"))
+    logger.propagate = False
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+class Metrics:
+    """Prometheus 텍스트 형식으로 내보낼 수 있는 카운터/히스토그램 모음 (스레드 안전)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        self._counters = {}    # (이름, 라벨 튜플) → 값
+        self._histograms = {}  # (이름, 라벨 튜플) → [버킷별 개수..., 합계, 개수]
+        self._buckets = {}
+
+    def inc(self, name: str, value: float = 1, help: str = "", **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._help.setdefault(name, ("counter", help))
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, help: str = "", buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._help.setdefault(name, ("histogram", help))
+            self._buckets.setdefault(name, buckets)
+            state = self._histograms.get(key)
+            if state is None:
+                state = self._histograms[key] = [0] * len(buckets) + [0.0, 0]
+            for i, bound in enumerate(self._buckets[name]):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self) -> str:
+        """Prometheus 텍스트 노출 형식"""
+        lines = []
+        with self._lock:
+            for name, (kind, help) in sorted(self._help.items()):
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                if kind == "counter":
+                    for (metric, labels), value in sorted(self._counters.items()):
+                        if metric == name:
+                            lines.append(f"{name}{_format_labels(labels)} {value:g}")
+                    continue
+                for (metric, labels), state in sorted(self._histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, count in zip(self._buckets[name], state):
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', f'{bound:g}'),))} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {state[-1]}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {state[-2]:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {state[-1]}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+metrics = Metrics()
+
+
+def _usage_value(usage, *keys) -> int:
+    """OpenAI usage 객체 / LangChain token_usage dict / usage_metadata에서 토큰 수 읽기"""
+    for key in keys:
+        value = usage.get(key) if isinstance(usage, dict) else getattr(usage, key, None)
+        if value:
+            return int(value)
+    return 0
+
+
+class Span:
+    """작업 하나의 시작/종료 시각, 속성, 자식 span"""
+
+    def __init__(self, name: str, parent: "Span" = None, attributes: dict = None, detached: bool = False):
+        self.name = name
+        self.parent = parent
+        self.attributes = dict(attributes or {})
+        self.children = []
+        self.detached = detached  # 요청 밖에서 만든 span - 트리에 붙이지 않고 지표만 기록
+        self.error = None
+        self.started_at = time.time()
+        self.duration = None
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        if parent is None:
+            self.trace_id = uuid.uuid4().hex[:16]
+            self.sampled = random.random() < TRACE_LOG_SAMPLE_RATE
+        else:
+            self.trace_id = parent.trace_id
+            self.sampled = parent.sampled
+            with parent._lock:
+                parent.children.append(self)
+
+    @property
+    def root(self) -> "Span":
+        span = self
+        while span.parent is not None:
+            span = span.parent
+        return span
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def record_usage(self, usage):
+        """LLM/임베딩 응답의 토큰 사용량 기록"""
+        if usage is None:
+            return
+        prompt = _usage_value(usage, "prompt_tokens", "input_tokens")
+        completion = _usage_value(usage, "completion_tokens", "output_tokens")
+        self.attributes["prompt_tokens"] = self.attributes.get("prompt_tokens", 0) + prompt
+        self.attributes["completion_tokens"] = self.attributes.get("completion_tokens", 0) + completion
+        metrics.inc("travelgenie_tokens_total", prompt, help="LLM/임베딩 토큰 사용량", span=self.name, kind="prompt")
+        if completion:
+            metrics.inc("travelgenie_tokens_total", completion, help="LLM/임베딩 토큰 사용량", span=self.name, kind="completion")
+
+    def end(self):
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._start
+        metrics.observe("travelgenie_span_duration_seconds", self.duration, help="단계별 소요 시간(초)", span=self.name)
+        if self.error:
+            metrics.inc("travelgenie_span_errors_total", help="단계별 오류 수", span=self.name)
+
+    def walk(self):
+        yield self
+        for child in list(self.children):
+            yield from child.walk()
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "started_at": self.started_at,
+            "duration_ms": round((self.duration or 0) * 1000, 2),
+            "attributes": self.attributes,
+            "error": self.error,
+            "children": [child.to_dict() for child in list(self.children)],
+        }
+
+
+_current = contextvars.ContextVar("tracing_current_span", default=None)
+
+
+def current_span():
+    return _current.get()
+
+
+def start_span(name: str, **attributes) -> Span:
+    """현재 span의 자식 span 시작 - 끝낼 때 end() 호출 (콜백처럼 with로 감쌀 수 없는 경우용)"""
+    parent = _current.get()
+    return Span(name, parent, attributes, detached=parent is None)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """현재 span의 자식 span - 블록 안에서 만든 span은 이 span의 자식이 됨"""
+    current = start_span(name, **attributes)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        current.end()
+
+
+@contextmanager
+def trace(name: str, **attributes):
+    """요청 하나의 span 트리 시작 (이미 요청 안이면 일반 자식 span)"""
+    if _current.get() is not None:
+        with span(name, **attributes) as current:
+            yield current
+        return
+
+    root = Span(name, None, attributes)
+    token = _current.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        root.end()
+        _finish_trace(root)
+
+
+def traced(name: str):
+    """함수 실행을 span으로 감싸는 데코레이터 (async 함수도 지원)"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def annotate(**attributes):
+    """현재 span에 속성 추가 (요청 밖이면 무시)"""
+    current = _current.get()
+    if current is not None:
+        current.set(**attributes)
+
+
+def record_cache(cache: str, hit: bool, count: int = 1):
+    """캐시 조회 결과를 현재 span 속성(cache.<이름>.hits/misses)과 카운터에 기록"""
+    if count <= 0:
+        return
+    result = "hits" if hit else "misses"
+    current = _current.get()
+    if current is not None:
+        key = f"cache.{cache}.{result}"
+        current.attributes[key] = current.attributes.get(key, 0) + count
+    metrics.inc("travelgenie_cache_requests_total", count, help="캐시 조회 수", cache=cache, result="hit" if hit else "miss")
+
+
+def record_cache_savings(cache: str, seconds: float):
+    """캐시 적중으로 아낀 시간(원래 답변을 만드는 데 걸린 시간)을 현재 span 속성과 카운터에 기록"""
+    current = _current.get()
+    if current is not None:
+        key = f"cache.{cache}.saved_s"
+        current.attributes[key] = round(current.attributes.get(key, 0) + seconds, 3)
+    metrics.inc("travelgenie_cache_saved_seconds_total", seconds, help="캐시 적중으로 아낀 시간(초)", cache=cache)
+
+
+def log_event(event: str, level: int = logging.INFO, force: bool = False, **fields):
+    """구조화 로그 한 줄 (JSON) - 현재 요청이 샘플링된 경우에만 (force=True면 항상)"""
+    current = _current.get()
+    if not force and not (current.sampled if current is not None else random.random() < TRACE_LOG_SAMPLE_RATE):
+        return
+    record = {"event": event, "time": round(time.time(), 3)}
+    if current is not None:
+        record["trace_id"] = current.trace_id
+        record["span"] = current.name
+    record.update(fields)
+    logger.log(level, json.dumps(record, ensure_ascii=False, default=str))
+
+
+def stage_summary(root: Span) -> list:
+    """span 이름별 호출 수/소요 시간/토큰/캐시 적중 요약 (처음 시작한 순서)"""
+    rows = {}
+    for current in root.walk():
+        if current is root:
+            continue
+        row = rows.setdefault(current.name, {
+            "stage": current.name, "calls": 0, "total_ms": 0.0, "max_ms": 0.0,
+            "prompt_tokens": 0, "completion_tokens": 0, "cache_hits": 0, "errors": 0,
+        })
+        duration_ms = (current.duration or 0) * 1000
+        row["calls"] += 1
+        row["total_ms"] += duration_ms
+        row["max_ms"] = max(row["max_ms"], duration_ms)
+        row["prompt_tokens"] += current.attributes.get("prompt_tokens", 0)
+        row["completion_tokens"] += current.attributes.get("completion_tokens", 0)
+        row["cache_hits"] += sum(
+            value for key, value in current.attributes.items() if key.startswith("cache.") and key.endswith(".hits")
+        )
+        row["errors"] += 1 if current.error else 0
+    for row in rows.values():
+        row["total_ms"] = round(row["total_ms"], 1)
+        row["max_ms"] = round(row["max_ms"], 1)
+    return list(rows.values())
+
+
+_file_lock = threading.Lock()
+
+
+def _finish_trace(root: Span):
+    metrics.inc("travelgenie_requests_total", help="요청 수", request=root.name, status="error" if root.error else "ok")
+    slow = root.duration >= TRACE_SLOW_SECONDS
+    if root.sampled or root.error or slow:
+        tokens = sum(span.attributes.get("prompt_tokens", 0) + span.attributes.get("completion_tokens", 0) for span in root.walk())
+        logger.log(
+            logging.WARNING if root.error or slow else logging.INFO,
+            json.dumps({
+                "event": "request",
+                "trace_id": root.trace_id,
+                "name": root.name,
+                "duration_ms": round(root.duration * 1000, 1),
+                "spans": sum(1 for _ in root.walk()),
+                "tokens": tokens,
+                "error": root.error,
+                "stages": {row["stage"]: row["total_ms"] for row in stage_summary(root)},
+            }, ensure_ascii=False)
+        )
+    try:
+        with _file_lock:
+            if TRACE_FILE:
+                with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(root.to_dict(), ensure_ascii=False, default=str) + "\n")
+            if PROMETHEUS_TEXTFILE:
+                tmp_path = PROMETHEUS_TEXTFILE + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(metrics.render())
+                os.replace(tmp_path, PROMETHEUS_TEXTFILE)
+    except OSError as e:
+        logger.warning(json.dumps({"event": "trace_export_failed", "error": str(e)}, ensure_ascii=False))
+
+
+def _create_langchain_handler():
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class TracingCallbackHandler(BaseCallbackHandler):
+        """ReAct Agent의 LLM 호출(agent turn)마다 span 기록"""
+
+        def __init__(self):
+            self._spans = {}
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._spans[run_id] = start_span("agent.llm", messages=sum(len(batch) for batch in messages))
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            current = self._spans.pop(run_id, None)
+            if current is None:
+                return
+            usage = (response.llm_output or {}).get("token_usage")
+            if not usage and response.generations and response.generations[0]:
+                usage = getattr(response.generations[0][0].message, "usage_metadata", None)
+            current.record_usage(usage)
+            current.end()
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            current = self._spans.pop(run_id, None)
+            if current is not None:
+                current.error = f"{type(error).__name__}: {error}"
+                current.end()
+
+    return TracingCallbackHandler()
+
+
+_langchain_handler = None
+
+
+def langchain_callbacks() -> list:
+    """LangChain/LangGraph 실행 config의 callbacks에 넣을 핸들러 목록"""
+    global _langchain_handler
+    if _langchain_handler is None:
+        _langchain_handler = _create_langchain_handler()
+    return [_langchain_handler]
@@ -1,13 +1,20 @@
 # utils.py
 
-import json
-from pathlib import Path
 from dotenv import load_dotenv
+import asyncio
+import logging
 import os  
-from azure.search.documents import SearchClient
-from azure.core.credentials import AzureKeyCredential
-from openai import AzureOpenAI
-import base64
+from pydantic import BaseModel, Field
+from typing import List
+from embedding_cache import EmbeddingCache, normalize_text
+from vector_index import LocalVectorIndex
+from vector_store import VECTOR_STORE_PATH, VectorStore
+from place_store import get_place_store, make_safe_id
+from gazetteer import get_gazetteer
+from spatial_index import find_nearby, format_nearby, place_coordinates
+import tracing
+from context_builder import build_context, count_message_tokens, get_budget, truncate_to_tokens
+from resources import get_resource, get_openai_client, get_search_client, get_async_openai_client, get_async_search_client
 
 load_dotenv()
 OPENAI_DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
@@ -15,107 +22,444 @@ AZURE_SEARCH_ENDPOINT = os.getenv("AZURE_SEARCH_ENDPOINT")
 AZURE_SEARCH_INDEX_NAME = os.getenv("AZURE_SEARCH_INDEX_NAME")
 AZURE_SEARCH_API_KEY = os.getenv("AZURE_SEARCH_API_KEY")
 EMBEDDING_DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME")
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.sqlite3")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000"))
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+# RAG 검색 백엔드: "azure" (Azure AI Search, 기본값) 또는 "local" (NumPy 인메모리 인덱스)
+RAG_BACKEND = os.getenv("RAG_BACKEND", "azure")
+# 로컬 백엔드에서 벡터 저장소(full.npy가 있을 때)로 상위 후보를 원본 정밀도로 다시 계산할지
+VECTOR_STORE_RESCORE = os.getenv("VECTOR_STORE_RESCORE", "1") == "1"
 
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version=os.getenv("AZURE_OPENAI_API_VERSION"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-)
+# 장소 문서가 추가/변경될 때 호출할 함수 목록 (캐시 무효화 등)
+_document_listeners = []
 
-search_client = SearchClient(
-    endpoint=AZURE_SEARCH_ENDPOINT,
-    index_name=AZURE_SEARCH_INDEX_NAME,
-    credential=AzureKeyCredential(AZURE_SEARCH_API_KEY)
-)
+def __getattr__(name):
+    """기존 `from utils import client` 형태 호환 - 처음 접근할 때 생성"""
+    if name == "client":
+        return get_openai_client()
+    if name == "search_client":
+        return get_search_client()
+    if name == "embedding_cache":
+        return get_embedding_cache()
+    raise AttributeError(f"module 'utils' has no attribute '{name}'")
+
+def get_embedding_cache():
+    """임베딩 디스크 캐시"""
+    return get_resource(
+        "embedding_cache",
+        lambda: EmbeddingCache(EMBEDDING_CACHE_PATH, max_entries=EMBEDDING_CACHE_MAX_ENTRIES)
+    )
+
+# 동기/비동기 함수가 같은 프롬프트를 쓰도록 메시지 구성은 한 곳에서
+# 고정된 시스템 프롬프트를 항상 첫 메시지로 두고 요청마다 바뀌는 내용은 뒤에 붙임 (프롬프트 캐시 적중용)
+# 사용자 입력/참고 정보/원본 답변은 호출 위치별 토큰 예산(context_builder.TOKEN_BUDGETS)으로 자름
+def _user_input(text):
+    return truncate_to_tokens(text, get_budget("user_input"))
+
+def _classify_messages(input_text):
+    return [
+        {
+            "role": "system",
+            "content": "다음 입력이 '관광지 이름'인지 '여행 조건 설명'인지 판단해줘. 결과는 '장소' 또는 '조건' 중 하나만 반환해."
+        },
+        {"role": "user", "content": _user_input(input_text)}
+    ]
+
+def _rag_messages(user_input, context, max_context_tokens=None):
+    return [
+        {"role": "system", "content": "너는 친절한 여행 가이드야. 아래 정보를 참고해서 대답해."},
+        {"role": "system", "content": truncate_to_tokens(context, get_budget("rag_context", max_context_tokens))},
+        {"role": "user", "content": _user_input(user_input)}
+    ]
+
+def _extract_messages(user_input):
+    return [
+        {"role": "system", "content": "다음 사용자의 문장에서 '장소명'만 정확하게 추출해줘. 예: '서울대학교', '부산 해운대', '경복궁'. 장소 외의 단어는 제거해."},
+        {"role": "user", "content": _user_input(user_input)}
+    ]
+
+def _gpt_messages(user_input):
+    return [
+        {"role": "system", "content": "너는 친절한 여행사 직원이야. 사용자의 질문에 대해 여행 정보를 제공해줘. 예산과 준비물도 함께 정리해줘."},
+        {"role": "user", "content": _user_input(user_input)}
+    ]
+
+def _itinerary_messages(user_input, itinerary):
+    return [
+        {"role": "system", "content": "너는 친절한 여행사 직원이야. 아래 일정의 방문 순서와 날짜는 바꾸지 말고, 각 장소를 소개하면서 일정을 안내해줘. 예산과 준비물도 함께 정리해줘."},
+        {"role": "system", "content": itinerary},
+        {"role": "user", "content": _user_input(user_input)}
+    ]
+
+def _structure_messages(user_input, response, max_input_tokens=None):
+    response = truncate_to_tokens(response, get_budget("structure_input", max_input_tokens))
+    return [
+        {"role": "system", "content": "당신은 여행 정보를 체계적으로 정리하는 전문가입니다. 원본 텍스트를 요약/상세 가이드/부가정보로 나누고, 키워드, 준비사항, 유용한 정보, 예상 예산(원화 정수)을 함께 정리하세요."},
+        {"role": "user", "content": f"사용자 요청: {_user_input(user_input)}\n\n원본 텍스트:\n{response}"}
+    ]
+
+def _vector_queries(embedded):
+    return [
+        {
+            "vector": embedded,
+            "fields": "contentVector",
+            "k": 3,
+            "kind": "vector"  # ← 반드시 추가!
+        }
+    ]
+
+def place_context(place):
+    """장소 설명 + 공간 인덱스로 찾은 주변 장소 (검색 문서면 저장소의 좌표 사용)"""
+    if place_coordinates(place) is None and "id" in place:
+        place = get_place_store().get_by_id(place["id"]) or place
+    nearby = format_nearby(find_nearby(place))
+    return f"{place['description']}\n{nearby}" if nearby else place["description"]
+
+def _build_rag_context(results, max_context_tokens=None):
+    """검색 결과(점수 0.9 이상)를 중복 제거/점수순으로 토큰 예산 안의 참고 정보로"""
+    chunks = [
+        (place_context(doc), doc["@search.score"])
+        for doc in results
+        if doc.get('@search.score', 0) >= 0.9 and "description" in doc
+    ]
+    context = build_context(chunks, get_budget("rag_context", max_context_tokens))
+    tracing.annotate(context_tokens=context["tokens"], chunks_used=context["used"], chunks_dropped=context["dropped"])
+    return context["text"]
+
+def _rag_sources(results):
+    """참고 정보 후보가 된 문서 id 목록 (답변 캐시를 문서 단위로 무효화할 때 사용)"""
+    return [doc["id"] for doc in results if doc.get('@search.score', 0) >= 0.9 and "description" in doc and "id" in doc]
+
+def _chat_completion(stage, messages, **kwargs):
+    """chat.completions.create 호출을 llm.<stage> span으로 기록 (소요 시간, 토큰)"""
+    with tracing.span(f"llm.{stage}", estimated_prompt_tokens=count_message_tokens(messages)) as span:
+        response = get_openai_client().chat.completions.create(
+            model=OPENAI_DEPLOYMENT_NAME,
+            messages=messages,
+            **kwargs
+        )
+        span.record_usage(getattr(response, "usage", None))
+    return response
+
+async def _achat_completion(stage, messages, **kwargs):
+    with tracing.span(f"llm.{stage}", estimated_prompt_tokens=count_message_tokens(messages)) as span:
+        response = await get_async_openai_client().chat.completions.create(
+            model=OPENAI_DEPLOYMENT_NAME,
+            messages=messages,
+            **kwargs
+        )
+        span.record_usage(getattr(response, "usage", None))
+    return response
 
 def classify_input(input_text: str) -> str:
     """입력 문장이 장소 기반인지 조건 기반인지 분류"""
-    response = client.chat.completions.create(
-        model=OPENAI_DEPLOYMENT_NAME,
-        messages=[
-            {
-                "role": "system",
-                "content": "다음 입력이 '관광지 이름'인지 '여행 조건 설명'인지 판단해줘. 결과는 '장소' 또는 '조건' 중 하나만 반환해."
-            },
-            {"role": "user", "content": input_text}
-        ]
-    )
+    response = _chat_completion("classify", _classify_messages(input_text))
     return response.choices[0].message.content.strip()
 
+def _cached_embeddings(texts):
+    """(정규화 텍스트 목록, 캐시에 있던 벡터 dict, API로 보낼 배치 목록) 반환"""
+    normalized = [normalize_text(text) for text in texts]
+    vectors = get_embedding_cache().get_many(EMBEDDING_DEPLOYMENT_NAME, normalized)
+    misses = [text for text in dict.fromkeys(normalized) if text not in vectors]
+    tracing.record_cache("embedding", True, len(set(normalized)) - len(misses))
+    tracing.record_cache("embedding", False, len(misses))
+    batches = [misses[i:i + EMBEDDING_BATCH_SIZE] for i in range(0, len(misses), EMBEDDING_BATCH_SIZE)]
+    return normalized, vectors, batches
+
+def _store_embeddings(vectors, batch, response):
+    embedded = {batch[item.index]: item.embedding for item in response.data}
+    get_embedding_cache().put_many(EMBEDDING_DEPLOYMENT_NAME, embedded)
+    vectors.update(embedded)
+
+def embed_texts(texts):
+    """GPT 임베딩 벡터 일괄 생성 - 캐시에 없는 텍스트만 한 번의 요청으로 API 호출"""
+    with tracing.span("embedding", texts=len(texts)):
+        normalized, vectors, batches = _cached_embeddings(texts)
+        for batch in batches:
+            with tracing.span("llm.embeddings", batch_size=len(batch)) as span:
+                response = get_openai_client().embeddings.create(
+                    input=batch,
+                    model=EMBEDDING_DEPLOYMENT_NAME
+                )
+                span.record_usage(getattr(response, "usage", None))
+            _store_embeddings(vectors, batch, response)
+    return [vectors[text] for text in normalized]
+
 def embed_text(text):
-    """GPT 임베딩 벡터 생성"""
-    response = client.embeddings.create(
-        input=[text],
-        model=EMBEDDING_DEPLOYMENT_NAME
-    )
-    return response.data[0].embedding
+    """GPT 임베딩 벡터 생성 (캐시 사용)"""
+    return embed_texts([text])[0]
 
 def append_json_file(filepath, new_data):
-    """tour_data.json에 새 장소 추가"""
-    if not Path(filepath).exists():
-        with open(filepath, "w") as f:
-            json.dump([new_data], f, indent=2, ensure_ascii=False)
+    """장소 저장소에 새 장소 추가 (같은 이름이면 갱신)
+
+    기존 JSON 배열 파일 경로(tour_data.json)를 주면 그 파일을 옮긴 JSONL 저장소(tour_data.jsonl)에 씀
+    """
+    if filepath.endswith(".json"):
+        store = get_place_store(filepath + "l", legacy_path=filepath)
     else:
-        with open(filepath, "r+", encoding="utf-8") as f:
-            data = json.load(f)
-            data.append(new_data)
-            f.seek(0)
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        store = get_place_store(filepath)
+    store.upsert(new_data)
+
+def make_search_document(place, vector):
+    """장소 정보와 임베딩으로 검색 인덱스 문서 생성"""
+    return {
+        "id": make_safe_id(place["name"]),
+        "name": place["name"],
+        "description": place["description"],
+        "location": place["location"],
+        "url": place["url"],
+        "contentVector": vector
+    }
+
+def load_places():
+    """장소 저장소의 장소 전체"""
+    return get_place_store().all()
+
+def _place_document(doc_id):
+    """벡터 저장소 행의 문서 내용 (벡터 제외) - 저장소에서 사라진 장소면 None"""
+    place = get_place_store().get_by_id(doc_id)
+    if place is None:
+        return None
+    doc = make_search_document(place, None)
+    del doc["contentVector"]
+    return doc
+
+def _load_vector_store():
+    """VECTOR_STORE_PATH에 현재 임베딩 모델로 만든 저장소가 있으면 메모리 매핑으로 열기 (없으면 None)"""
+    if not VectorStore.exists(VECTOR_STORE_PATH):
+        return None
+    store = VectorStore(VECTOR_STORE_PATH, rescore=VECTOR_STORE_RESCORE)
+    if store.model != EMBEDDING_DEPLOYMENT_NAME:
+        # 임베딩 모델이 다르면 벡터를 비교할 수 없으므로 사용하지 않음
+        tracing.log_event("vector_store_model_mismatch", logging.WARNING, force=True,
+                          store_model=store.model, model=EMBEDDING_DEPLOYMENT_NAME)
+        return None
+    return store
+
+def _create_local_index():
+    places = load_places()
+    base = _load_vector_store()
+    index = LocalVectorIndex(base=base, doc_loader=_place_document)
+    if base is not None:
+        # 저장소를 만든 뒤에 추가된 장소만 임베딩
+        places = [place for place in places if make_safe_id(place["name"]) not in base]
+    vectors = embed_texts([place["name"] for place in places])
+    index.upsert_many([make_search_document(place, vector) for place, vector in zip(places, vectors)])
+    return index
+
+def get_local_index():
+    """로컬 벡터 인덱스 - 처음 사용할 때 생성
+
+    vector_store.py로 만든 저장소가 있으면 그 행렬을 메모리 매핑으로 쓰고, 없으면 장소 데이터 전체를 임베딩
+    """
+    return get_resource("local_index", _create_local_index)
+
+async def aget_local_index():
+    """get_local_index()의 비동기 버전 - 처음 생성(장소 전체 임베딩, 저장소 읽기)이 이벤트 루프를 막지 않도록 스레드에서"""
+    return await asyncio.to_thread(get_local_index)
+
+def add_document_listener(listener):
+    """검색 인덱스 문서가 추가/변경/삭제될 때마다 listener(doc) 호출 (삭제는 {"id": ...}만 전달)"""
+    _document_listeners.append(listener)
+
+def _notify_document_listeners(docs, failed):
+    for doc in docs:
+        if doc["id"] not in failed:
+            for listener in _document_listeners:
+                listener(doc)
+
+def upload_documents_to_search(docs):
+    """검색 인덱스에 문서 여러 개를 한 번에 추가/갱신 - 실패한 문서 id 목록 반환"""
+    with tracing.span("search.upload", backend=RAG_BACKEND, documents=len(docs)):
+        if RAG_BACKEND == "local":
+            get_local_index().upsert_many(docs)
+            failed = []
+        else:
+            results = get_search_client().merge_or_upload_documents(documents=docs)
+            failed = [result.key for result in results if not result.succeeded]
+    _notify_document_listeners(docs, failed)
+    return failed
+
+def delete_documents_from_search(doc_ids):
+    """검색 인덱스에서 문서 삭제 - 실패한 문서 id 목록 반환"""
+    if not doc_ids:
+        return []
+    with tracing.span("search.delete", backend=RAG_BACKEND, documents=len(doc_ids)):
+        if RAG_BACKEND == "local":
+            index = get_local_index()
+            for doc_id in doc_ids:
+                index.delete(doc_id)
+            failed = []
+        else:
+            results = get_search_client().delete_documents(documents=[{"id": doc_id} for doc_id in doc_ids])
+            failed = [result.key for result in results if not result.succeeded]
+    # 삭제도 문서 변경이므로 같은 listener에 알림 (id만 있는 dict)
+    _notify_document_listeners([{"id": doc_id} for doc_id in doc_ids], failed)
+    return failed
 
 def upload_document_to_search(doc):
-    """Azure AI Search 인덱스에 문서 추가"""
-    search_client.upload_documents(documents=[doc])
-
-def chat_with_rag(user_input, context):
-    response = client.chat.completions.create(
-        model=OPENAI_DEPLOYMENT_NAME,
-        messages=[
-            {"role": "system", "content": "너는 친절한 여행 가이드야. 아래 정보를 참고해서 대답해." + context},
-            {"role": "user", "content": user_input}
-        ]
-    )
-    return response.choices[0].message.content
+    """검색 인덱스에 문서 추가 (RAG_BACKEND에 따라 Azure AI Search 또는 로컬 인덱스)"""
+    upload_documents_to_search([doc])
 
-def make_safe_id(text: str) -> str:
-    encoded = base64.urlsafe_b64encode(text.encode()).decode()
-    return encoded.rstrip("=")  # padding 제거
+def chat_with_rag(user_input, context, max_context_tokens=None):
+    response = _chat_completion("rag", _rag_messages(user_input, context, max_context_tokens))
+    return response.choices[0].message.content
 
+def search_rag(user_input, max_context_tokens=None, with_sources=False):
+    """장소 질의와 비슷한 문서를 찾아 토큰 예산 안의 참고 정보 문자열로 반환
 
-def search_rag(user_input):
+    with_sources=True면 (참고 정보, 참고한 문서 id 목록) 반환
+    """
     embedded = embed_text(user_input)
-    results = search_client.search(
-        search_text="",
-        vector_queries=[
-            {
-                "vector": embedded,
-                "fields": "contentVector",
-                "k": 3,
-                "kind": "vector"  # ← 반드시 추가!
-            }
-        ]
-    )
-    contents = []
-    for doc in results:
-        if doc.get('@search.score', 0) >= 0.9 and "description" in doc:
-            contents.append(doc["description"])
-    return "\n".join(contents)
+    with tracing.span("search.query", backend=RAG_BACKEND) as span:
+        if RAG_BACKEND == "local":
+            results = get_local_index().search(embedded, k=3)
+        else:
+            results = list(get_search_client().search(
+                search_text="",
+                vector_queries=_vector_queries(embedded)
+            ))
+        span.set(results=len(results))
+        context = _build_rag_context(results, max_context_tokens)
+        return (context, _rag_sources(results)) if with_sources else context
 
 def extract_place_name(user_input: str) -> str:
-    response = client.chat.completions.create(
-        model=OPENAI_DEPLOYMENT_NAME,
-        messages=[
-            {"role": "system", "content": "다음 사용자의 문장에서 '장소명'만 정확하게 추출해줘. 예: '서울대학교', '부산 해운대', '경복궁'. 장소 외의 단어는 제거해."},
-            {"role": "user", "content": user_input}
-        ]
-    )
+    """문장에서 장소명 추출 - 알려진 장소/별칭이면 로컬에서 바로 찾고, 없을 때만 LLM 사용"""
+    place_name = get_gazetteer().match(user_input)
+    tracing.record_cache("gazetteer", bool(place_name))
+    if place_name:
+        return place_name
+    
+    response = _chat_completion("extract", _extract_messages(user_input))
     return response.choices[0].message.content.strip()
 
 def chat_with_gpt(user_input):
-    response = client.chat.completions.create(
-        model=OPENAI_DEPLOYMENT_NAME,
-        messages=[
-            {"role": "system", "content": "너는 친절한 여행사 직원이야. 사용자의 질문에 대해 여행 정보를 제공해줘. 예산과 준비물도 함께 정리해줘."},
-            {"role": "user", "content": user_input}
-        ]
-    )
-    return response.choices[0].message.content
\ No newline at end of file
+    response = _chat_completion("gpt", _gpt_messages(user_input))
+    return response.choices[0].message.content
+
+def chat_with_itinerary(user_input, itinerary):
+    """route_planner가 만든 일정(문자열)을 설명하는 답변 생성 - 순서/날짜는 LLM이 정하지 않음"""
+    response = _chat_completion("itinerary", _itinerary_messages(user_input, itinerary))
+    return response.choices[0].message.content
+
+class Budget(BaseModel):
+    accommodation: int = Field(description="숙박비 (1박 기준, 원)")
+    food: int = Field(description="식비 (1일 기준, 원)")
+    transport: int = Field(description="교통비 (왕복 기준, 원)")
+
+class TravelResult(BaseModel):
+    summary: str = Field(description="핵심 요약 (2-3문장)")
+    detailed_guide: str = Field(description="상세한 여행 가이드 (구체적인 정보, 팁, 추천사항)")
+    additional_info: str = Field(description="일정, 주변정보, 예산, 교통 등 부가정보")
+    keywords: List[str] = Field(description="핵심 키워드 5개")
+    preparation: List[str] = Field(description="준비사항 체크리스트 3-4개")
+    useful_info: List[str] = Field(description="유용한 여행 팁 3-4개")
+    budget: Budget
+
+def structure_response(user_input: str, response: str, max_input_tokens: int = None) -> TravelResult:
+    """Agent 응답을 스키마 고정(structured output) 호출 한 번으로 구조화"""
+    messages = _structure_messages(user_input, response, max_input_tokens)
+    with tracing.span("llm.structure", estimated_prompt_tokens=count_message_tokens(messages)) as span:
+        completion = get_openai_client().beta.chat.completions.parse(
+            model=OPENAI_DEPLOYMENT_NAME,
+            messages=messages,
+            response_format=TravelResult,
+            temperature=0.3
+        )
+        span.record_usage(getattr(completion, "usage", None))
+    return _parsed_travel_result(completion)
+
+def _parsed_travel_result(completion):
+    message = completion.choices[0].message
+    if message.parsed is None:
+        raise ValueError(f"구조화 응답 생성 실패: {message.refusal}")
+    return message.parsed
+
+
+# ---------------------------------------------------------------------------
+# 비동기 버전 - 같은 프롬프트/캐시를 쓰고 I/O만 AsyncAzureOpenAI, aio.SearchClient로 수행
+# ---------------------------------------------------------------------------
+
+async def aclassify_input(input_text: str) -> str:
+    response = await _achat_completion("classify", _classify_messages(input_text))
+    return response.choices[0].message.content.strip()
+
+async def aembed_texts(texts):
+    async def create(batch):
+        with tracing.span("llm.embeddings", batch_size=len(batch)) as span:
+            response = await get_async_openai_client().embeddings.create(input=batch, model=EMBEDDING_DEPLOYMENT_NAME)
+            span.record_usage(getattr(response, "usage", None))
+        return response
+
+    with tracing.span("embedding", texts=len(texts)):
+        normalized, vectors, batches = _cached_embeddings(texts)
+        responses = await asyncio.gather(*[create(batch) for batch in batches])
+        for batch, response in zip(batches, responses):
+            _store_embeddings(vectors, batch, response)
+    return [vectors[text] for text in normalized]
+
+async def aembed_text(text):
+    return (await aembed_texts([text]))[0]
+
+async def aupload_documents_to_search(docs):
+    with tracing.span("search.upload", backend=RAG_BACKEND, documents=len(docs)):
+        if RAG_BACKEND == "local":
+            index = await aget_local_index()
+            await asyncio.to_thread(index.upsert_many, docs)
+            failed = []
+        else:
+            results = await get_async_search_client().merge_or_upload_documents(documents=docs)
+            failed = [result.key for result in results if not result.succeeded]
+    _notify_document_listeners(docs, failed)
+    return failed
+
+async def achat_with_rag(user_input, context, max_context_tokens=None):
+    response = await _achat_completion("rag", _rag_messages(user_input, context, max_context_tokens))
+    return response.choices[0].message.content
+
+async def asearch_rag(user_input, max_context_tokens=None, with_sources=False):
+    embedded = await aembed_text(user_input)
+    with tracing.span("search.query", backend=RAG_BACKEND) as span:
+        if RAG_BACKEND == "local":
+            # 로컬 인덱스 검색은 장소 저장소(파일 잠금)에서 문서를 읽으므로 스레드에서
+            index = await aget_local_index()
+            results = await asyncio.to_thread(index.search, embedded, 3)
+        else:
+            paged = await get_async_search_client().search(
+                search_text="",
+                vector_queries=_vector_queries(embedded)
+            )
+            results = [doc async for doc in paged]
+        span.set(results=len(results))
+        # 참고 정보에 붙이는 주변 장소도 장소 저장소에서 읽음
+        context = await asyncio.to_thread(_build_rag_context, results, max_context_tokens)
+        return (context, _rag_sources(results)) if with_sources else context
+
+async def aextract_place_name(user_input: str) -> str:
+    place_name = get_gazetteer().match(user_input)
+    tracing.record_cache("gazetteer", bool(place_name))
+    if place_name:
+        return place_name
+
+    response = await _achat_completion("extract", _extract_messages(user_input))
+    return response.choices[0].message.content.strip()
+
+async def achat_with_gpt(user_input):
+    response = await _achat_completion("gpt", _gpt_messages(user_input))
+    return response.choices[0].message.content
+
+async def achat_with_itinerary(user_input, itinerary):
+    response = await _achat_completion("itinerary", _itinerary_messages(user_input, itinerary))
+    return response.choices[0].message.content
+
+async def astructure_response(user_input: str, response: str, max_input_tokens: int = None) -> TravelResult:
+    messages = _structure_messages(user_input, response, max_input_tokens)
+    with tracing.span("llm.structure", estimated_prompt_tokens=count_message_tokens(messages)) as span:
+        completion = await get_async_openai_client().beta.chat.completions.parse(
+            model=OPENAI_DEPLOYMENT_NAME,
+            messages=messages,
+            response_format=TravelResult,
+            temperature=0.3
+        )
+        span.record_usage(getattr(completion, "usage", None))
+    return _parsed_travel_result(completion)
@@ -0,0 +1,127 @@
+# vector_index.py
+import threading
+
+import numpy as np
+
+
+def cosine_to_search_score(similarity):
+    """코사인 유사도를 Azure AI Search의 @search.score(코사인 메트릭)와 같은 값으로 변환
+
+    Azure AI Search는 score = 1 / (1 + distance), distance = 1 - cosine 을 사용하므로
+    기존 `>= 0.9` 필터를 그대로 쓸 수 있다.
+    """
+    return 1.0 / (2.0 - similarity)
+
+
+class LocalVectorIndex:
+    """NumPy 기반 인메모리 벡터 인덱스 - 정규화된 float32 행렬 한 번의 곱으로 코사인 top-k 검색
+
+    base(vector_store.VectorStore)를 주면 디스크의 양자화 행렬을 기본 층으로 쓰고,
+    이후 추가/변경/삭제만 인메모리 행렬에 반영한다. base 행의 문서 내용은 doc_loader(id)로 가져온다.
+    """
+
+    def __init__(self, vector_field: str = "contentVector", base=None, doc_loader=None):
+        self.vector_field = vector_field
+        self.base = base
+        self._doc_loader = doc_loader
+        self._hidden = set()  # 인메모리 쪽에서 갱신/삭제되어 base에서 가려진 id
+        self._lock = threading.Lock()
+        self._matrix = None
+        self._size = 0
+        self._ids = []
+        self._docs = []
+        self._rows = {}
+
+    def __len__(self):
+        base_size = len(self.base) - len(self._hidden) if self.base is not None else 0
+        return self._size + base_size
+
+    def _hide_base(self, doc_id):
+        if self.base is not None and doc_id in self.base:
+            self._hidden.add(doc_id)
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _ensure_capacity(self, dim, extra):
+        if self._matrix is None:
+            self._matrix = np.zeros((max(extra, 16), dim), dtype=np.float32)
+        elif self._size + extra > self._matrix.shape[0]:
+            capacity = max(self._matrix.shape[0] * 2, self._size + extra)
+            grown = np.zeros((capacity, dim), dtype=np.float32)
+            grown[:self._size] = self._matrix[:self._size]
+            self._matrix = grown
+
+    def upsert(self, doc):
+        """Azure AI Search 업로드 문서와 같은 형태(id, contentVector 포함)의 문서 추가/갱신"""
+        self.upsert_many([doc])
+
+    def upsert_many(self, docs):
+        with self._lock:
+            for doc in docs:
+                self._hide_base(doc["id"])
+                vector = self._normalize(doc[self.vector_field])
+                stored = {key: value for key, value in doc.items() if key != self.vector_field}
+                row = self._rows.get(doc["id"])
+                if row is None:
+                    self._ensure_capacity(vector.shape[0], 1)
+                    row = self._size
+                    self._rows[doc["id"]] = row
+                    self._ids.append(doc["id"])
+                    self._docs.append(stored)
+                    self._size += 1
+                else:
+                    self._docs[row] = stored
+                self._matrix[row] = vector
+
+    def delete(self, doc_id):
+        """문서 삭제 - 마지막 행을 빈 자리로 옮겨 행렬을 연속으로 유지"""
+        with self._lock:
+            self._hide_base(doc_id)
+            row = self._rows.pop(doc_id, None)
+            if row is None:
+                return
+            last = self._size - 1
+            if row != last:
+                self._matrix[row] = self._matrix[last]
+                self._ids[row] = self._ids[last]
+                self._docs[row] = self._docs[last]
+                self._rows[self._ids[row]] = row
+            self._ids.pop()
+            self._docs.pop()
+            self._size -= 1
+
+    def _search_base(self, vector, k, hidden):
+        # 가려진 id만큼 더 뽑아서 걸러냄
+        results = []
+        for doc_id, similarity in self.base.search(vector, k + len(hidden)):
+            if doc_id in hidden:
+                continue
+            doc = self._doc_loader(doc_id)
+            if doc is not None:
+                results.append((similarity, doc))
+            if len(results) == k:
+                break
+        return results
+
+    def search(self, vector, k=3):
+        """질의 벡터와 가장 가까운 k개 문서를 @search.score와 함께 반환"""
+        with self._lock:
+            results = []
+            if self._size:
+                matrix = self._matrix[:self._size]
+                similarities = matrix @ self._normalize(vector)
+                top_k = min(k, self._size)
+                top = np.argpartition(-similarities, top_k - 1)[:top_k]
+                results = [(float(similarities[row]), self._docs[row]) for row in top]
+            hidden = set(self._hidden)
+        if self.base is not None:
+            results.extend(self._search_base(vector, k, hidden))
+        results.sort(key=lambda result: result[0], reverse=True)
+        return [
+            {**doc, "@search.score": float(cosine_to_search_score(similarity))}
+            for similarity, doc in results[:k]
+        ]
@@ -0,0 +1,161 @@
+# vector_store.py
+"""장소 임베딩 디스크 저장소 - 양자화 행렬(.npy)을 메모리 매핑으로 읽음
+
+파일 구성 (디렉터리 하나):
+    vectors.npy     정규화 벡터를 int8(행별 스케일) 또는 float16으로 저장한 (행 수, 차원) 행렬
+    scales.npy      int8일 때 행별 스케일 (float32)
+    full.npy        (선택) 원본 정밀도 float32 행렬 - 상위 후보 재채점용
+    meta.json       {"ids": [행 순서의 문서 id], "dtype", "dim", "model"} - 마지막에 씀
+
+np.load(mmap_mode="r")로 열기 때문에 시작할 때 파일을 읽지 않고, 여러 워커 프로세스가 같은 페이지 캐시를 공유한다.
+검색은 행 블록 단위로 계산해서 카탈로그가 커져도 상주 메모리가 늘지 않는다.
+
+사용법:
+    python vector_store.py --dtype int8 --full-precision
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+VECTOR_STORE_PATH = os.getenv("VECTOR_STORE_PATH", "vector_store")
+VECTOR_STORE_DTYPES = ("int8", "float16")
+SEARCH_BLOCK_ROWS = 2048  # 한 번에 float32로 바꿔 계산하는 행 수 (CPU 캐시에 들어가는 크기가 빠름)
+
+
+def _normalize_rows(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _replace_npy(path: str, array):
+    tmp_path = path + ".tmp.npy"
+    np.save(tmp_path, array)
+    os.replace(tmp_path, path)
+
+
+def write_vector_store(path: str, ids, vectors, dtype: str = "int8", full_precision: bool = False, model: str = None):
+    """id 목록과 벡터로 저장소 파일 생성 (기존 파일은 교체)"""
+    if dtype not in VECTOR_STORE_DTYPES:
+        raise ValueError(f"지원하지 않는 dtype: {dtype} ({', '.join(VECTOR_STORE_DTYPES)})")
+    os.makedirs(path, exist_ok=True)
+    matrix = _normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1))
+
+    if dtype == "int8":
+        # 행별 최대 절댓값을 127에 맞춤 - 정규화 벡터는 성분 크기가 고르게 작아서 행별 스케일이 정확도에 유리
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        _replace_npy(os.path.join(path, "vectors.npy"), np.round(matrix / scales[:, None]).astype(np.int8))
+        _replace_npy(os.path.join(path, "scales.npy"), scales.astype(np.float32))
+    else:
+        _replace_npy(os.path.join(path, "vectors.npy"), matrix.astype(np.float16))
+
+    full_path = os.path.join(path, "full.npy")
+    if full_precision:
+        _replace_npy(full_path, matrix)
+    elif os.path.exists(full_path):
+        os.remove(full_path)
+
+    meta = {"ids": list(ids), "dtype": dtype, "dim": int(matrix.shape[1]) if len(matrix) else 0, "model": model}
+    tmp_path = os.path.join(path, "meta.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(path, "meta.json"))
+
+
+class VectorStore:
+    """메모리 매핑된 읽기 전용 벡터 저장소 - search()는 (id, 코사인 유사도) 목록 반환"""
+
+    def __init__(self, path: str = VECTOR_STORE_PATH, rescore: bool = True, rescore_factor: int = 4):
+        self.path = path
+        self.rescore_factor = rescore_factor
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.ids = meta["ids"]
+        self.dtype = meta["dtype"]
+        self.model = meta.get("model")
+        self._rows = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        self._vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        if self._vectors.shape[0] != len(self.ids):
+            raise ValueError(f"벡터 저장소 행 수({self._vectors.shape[0]})와 id 수({len(self.ids)})가 다릅니다: {path}")
+        self._scales = np.load(os.path.join(path, "scales.npy"), mmap_mode="r") if self.dtype == "int8" else None
+        full_path = os.path.join(path, "full.npy")
+        self._full = np.load(full_path, mmap_mode="r") if rescore and os.path.exists(full_path) else None
+
+    @staticmethod
+    def exists(path: str = VECTOR_STORE_PATH) -> bool:
+        return os.path.exists(os.path.join(path, "meta.json"))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._rows
+
+    def _approximate_similarities(self, query):
+        similarities = np.empty(len(self.ids), dtype=np.float32)
+        for start in range(0, len(self.ids), SEARCH_BLOCK_ROWS):
+            block = np.asarray(self._vectors[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+            scores = block @ query
+            if self._scales is not None:
+                scores *= self._scales[start:start + SEARCH_BLOCK_ROWS]
+            similarities[start:start + len(block)] = scores
+        return similarities
+
+    def search(self, vector, k: int = 3):
+        """양자화 행렬로 후보를 고르고, full.npy가 있으면 상위 후보만 원본 정밀도로 다시 계산"""
+        if not self.ids or k <= 0:
+            return []
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        similarities = self._approximate_similarities(query)
+
+        candidates = min(len(self.ids), k * self.rescore_factor if self._full is not None else k)
+        top = np.argpartition(-similarities, candidates - 1)[:candidates]
+        if self._full is not None:
+            rows = np.sort(top)  # mmap은 순서대로 읽는 편이 빠름
+            similarities[rows] = np.asarray(self._full[rows], dtype=np.float32) @ query
+        top = top[np.argsort(-similarities[top])][:k]
+        return [(self.ids[row], float(similarities[row])) for row in top]
+
+
+def build_from_places(path: str = VECTOR_STORE_PATH, dtype: str = "int8", full_precision: bool = False) -> int:
+    """장소 저장소 전체를 임베딩(캐시 사용)해서 벡터 저장소 생성 - 저장한 행 수 반환"""
+    from utils import EMBEDDING_DEPLOYMENT_NAME, embed_texts, load_places, make_safe_id
+
+    places = load_places()
+    if not places:
+        return 0
+    write_vector_store(
+        path,
+        [make_safe_id(place["name"]) for place in places],
+        embed_texts([place["name"] for place in places]),
+        dtype=dtype,
+        full_precision=full_precision,
+        model=EMBEDDING_DEPLOYMENT_NAME
+    )
+    return len(places)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="장소 임베딩을 양자화 벡터 저장소로 내보내기 (RAG_BACKEND=local에서 사용)")
+    parser.add_argument("--path", default=VECTOR_STORE_PATH, help="저장소 디렉터리")
+    parser.add_argument("--dtype", choices=VECTOR_STORE_DTYPES, default="int8", help="저장 정밀도")
+    parser.add_argument("--full-precision", action="store_true", help="재채점용 float32 행렬도 저장")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    count = build_from_places(args.path, dtype=args.dtype, full_precision=args.full_precision)
+    if not count:
+        raise SystemExit("장소 저장소가 비어 있습니다.")
+    size = sum(os.path.getsize(os.path.join(args.path, name)) for name in os.listdir(args.path))
+    print(f"{count}개 벡터 저장 ({args.dtype}, {size / 1024 / 1024:.1f} MB, {time.perf_counter() - start:.1f}초): {args.path}")